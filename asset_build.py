@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Parallel build engine for the Pillow asset generators.
+Each asset is an independent job; jobs run on a process pool and
+results are reported in the order the jobs were defined.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+
+import build_manifest
+import render_trace
+
+def default_workers():
+    """One worker per CPU core."""
+    return os.cpu_count() or 1
+
+def _submit(pool, func, job):
+    # Workers record their own spans and hand them back with the result
+    if render_trace.enabled():
+        return pool.submit(render_trace.call_traced, func, *job)
+    return pool.submit(func, *job)
+
+def _result(future):
+    result = future.result()
+    if render_trace.enabled():
+        result, events = result
+        render_trace.merge(events)
+    return result
+
+def run_jobs(func, jobs, workers=None):
+    """Run func(*job) for every job and return the results in job order."""
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    if workers is None:
+        workers = default_workers()
+    workers = max(1, min(workers, len(jobs)))
+
+    # Not worth a pool for a single worker
+    if workers == 1:
+        return [func(*job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [_submit(pool, func, job) for job in jobs]
+        return [_result(future) for future in futures]
+
+class JobQueue:
+    """Run jobs on a process pool as they are submitted; results come back in submission order.
+
+    Lets a producer that can't wait (the browser event loop) hand work off
+    and collect it later. At most window jobs are in flight: beyond that,
+    ready() waits for the oldest, which holds the producer back. A job that
+    raises comes back with its exception, so one bad job never stops the rest.
+    """
+
+    def __init__(self, workers=None, window=None):
+        if workers is None:
+            workers = default_workers()
+        workers = max(1, workers)
+        # Not worth a pool for a single worker; jobs then run as they are submitted
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._window = window or workers * 4
+        self._pending = deque()
+
+    def submit(self, tag, func, *job):
+        if self._pool is None:
+            try:
+                outcome = (func(*job), None)
+            except Exception as exc:
+                outcome = (None, exc)
+            self._pending.append((tag, outcome))
+        else:
+            self._pending.append((tag, _submit(self._pool, func, job)))
+
+    def _pop(self):
+        tag, pending = self._pending.popleft()
+        if self._pool is None:
+            return (tag, *pending)
+        try:
+            return tag, _result(pending), None
+        except Exception as exc:
+            return tag, None, exc
+
+    def ready(self):
+        """Yield (tag, result, error) for the finished jobs at the head of the queue; error is None on success."""
+        while self._pending and (
+            self._pool is None or self._pending[0][1].done() or len(self._pending) > self._window
+        ):
+            yield self._pop()
+
+    def drain(self):
+        """Wait for and yield every remaining (tag, result, error)."""
+        while self._pending:
+            yield self._pop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=exc[0] is not None)
+
+def batched(iterable, size):
+    """Yield lists of up to size items, consuming the iterable lazily."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def build(func, jobs, output_dir, job_hash, workers=None, force=False, job_outputs=None, cache=None,
+          manifest_hash=None):
+    """Run only the jobs whose input hash changed.
+    
+    job_outputs(job) lists the filenames a job writes (default: its last field).
+    With a render_cache.RenderCache, jobs whose every output is already cached
+    are copied from it instead of rendered, and fresh renders are added to it.
+    manifest_hash(digest) folds in settings applied after rendering (e.g. the
+    PNG encoding), which change the outputs but not the cached renders.
+    Returns (messages, skipped) and updates the manifest in output_dir.
+    """
+    job_outputs = job_outputs or (lambda job: [job[-1]])
+    manifest_hash = manifest_hash or (lambda digest: digest)
+    manifest = build_manifest.Manifest(output_dir)
+    pending = []
+    skipped = []
+    for job in jobs:
+        digest = job_hash(job)
+        filenames = job_outputs(job)
+        if not force and all(manifest.is_current(filename, manifest_hash(digest)) for filename in filenames):
+            skipped.extend(filenames)
+        else:
+            pending.append((job, digest))
+
+    restored = []
+    if cache is not None:
+        rendering = []
+        for job, digest in pending:
+            filenames = job_outputs(job)
+            # Stops at the first miss, so a partly cached job is simply rendered again
+            if all(cache.fetch(cache.key(digest, filename), os.path.join(output_dir, filename)) for filename in filenames):
+                restored.append([f"Cached: {filename}" for filename in filenames])
+            else:
+                rendering.append((job, digest))
+    else:
+        rendering = pending
+
+    messages = run_jobs(func, [job for job, _ in rendering], workers)
+    if cache is not None:
+        for job, digest in rendering:
+            for filename in job_outputs(job):
+                cache.store(cache.key(digest, filename), os.path.join(output_dir, filename))
+    for job, digest in pending:
+        for filename in job_outputs(job):
+            manifest.record(filename, manifest_hash(digest))
+    manifest.save()
+    return restored + messages, skipped
+
+def add_workers_argument(parser):
+    """Add the shared --workers option to a script's argument parser."""
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of worker processes (default: one per CPU core)",
+    )
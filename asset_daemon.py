@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Watch mode for the signature and letterhead generators.
+One long-running process keeps Chromium, its pages and the Pillow fonts
+warm, polls the roster and template sources, and re-renders only the
+outputs whose manifest digest changed after each save.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import signal
+import time
+
+import build_manifest
+import generate_letterhead
+import generate_signatures
+import pillow_renderer
+import png_encode
+import resample
+import roster
+
+# Seconds between mtime polls, and how long a save must stay quiet before rebuilding
+POLL_INTERVAL = 0.1
+SETTLE_TIME = 0.05
+
+# Template sources reloaded in place when they change on disk
+TEMPLATE_MODULES = (generate_signatures, generate_letterhead, pillow_renderer)
+
+class SourceWatcher:
+    """Poll file mtimes; changed() returns the paths modified since the last call."""
+
+    def __init__(self, paths):
+        self.mtimes = {path: self._mtime(path) for path in paths}
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            # Editors briefly remove the file while saving
+            return None
+
+    def changed(self):
+        changed = set()
+        for path, before in self.mtimes.items():
+            now = self._mtime(path)
+            if now != before:
+                self.mtimes[path] = now
+                changed.add(path)
+        return changed
+
+class WarmBrowser:
+    """Chromium plus the signature page pool and a letterhead page, kept open between builds."""
+
+    def __init__(self, playwright, concurrency):
+        self.playwright = playwright
+        self.concurrency = concurrency
+        self.browser = None
+        self.settings = None
+        self.signature_pages = []
+        self._letterhead_page = None
+
+    def _current_settings(self):
+        return (
+            generate_signatures.viewport, generate_signatures.device_scale_factor,
+            generate_letterhead.viewport, generate_letterhead.device_scale_factor,
+        )
+
+    async def ensure(self):
+        """Launch Chromium, or relaunch it after a crash or a viewport/scale change."""
+        if self.browser is not None and self.browser.is_connected() and self.settings == self._current_settings():
+            return
+        await self.close()
+        start = time.perf_counter()
+        self.browser = await self.playwright.chromium.launch()
+        self.settings = self._current_settings()
+        _, self.signature_pages = await generate_signatures.open_pages(self.browser, self.concurrency)
+        print(f"Browser ready ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    async def letterhead_page(self):
+        if self._letterhead_page is None:
+            context = await self.browser.new_context(
+                viewport=generate_letterhead.viewport,
+                device_scale_factor=generate_letterhead.device_scale_factor,
+            )
+            self._letterhead_page = await context.new_page()
+        return self._letterhead_page
+
+    async def close(self):
+        browser, self.browser = self.browser, None
+        self.signature_pages = []
+        self._letterhead_page = None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                # Already gone, e.g. after a crash
+                pass
+
+class AssetDaemon:
+    """Incremental rebuilds of every signature and the letterhead against in-memory manifests."""
+
+    def __init__(self, args, browser=None):
+        self.args = args
+        self.browser = browser
+        self.signature_manifest = build_manifest.Manifest(args.signature_dir)
+        self.letterhead_manifest = build_manifest.Manifest(args.letterhead_dir)
+
+    def _digest(self, digest):
+        # Same manifest digests as the one-shot generators, so the two never fight over outputs
+        return png_encode.encode_hash(
+            resample.variant_hash(digest, self.args.densities, self.args.widths), self.args.optimize, self.args.webp,
+        )
+
+    def _members(self):
+        if not self.args.roster:
+            return generate_signatures.team_members
+
+        def report_bad_row(line_no, message):
+            print(f"✗ Skipped roster line {line_no}: {message}")
+
+        return roster.iter_members(
+            self.args.roster, self.args.roster_format, report_bad_row, key=generate_signatures.signature_filename,
+        )
+
+    def signature_jobs(self, force=False):
+        for member in self._members():
+            html_content = generate_signatures.generate_signature_html(member)
+            filename = generate_signatures.signature_filename(member)
+            digest = self._digest(generate_signatures.signature_hash(member, html_content, self.args.backend))
+            if force or not self.signature_manifest.is_current(filename, digest):
+                yield (member, html_content, filename, digest)
+
+    def letterhead_job(self, force=False):
+        html_content = generate_letterhead.generate_letterhead_html()
+        digest = self._digest(generate_letterhead.letterhead_hash(html_content, self.args.backend))
+        if force or not self.letterhead_manifest.is_current(generate_letterhead.letterhead_filename, digest):
+            return html_content, digest
+        return None
+
+    async def build(self, force=False):
+        """Render every stale output; returns (rendered, failed) counts."""
+        args = self.args
+        written = []
+        failed = []
+
+        def finish(output_dir, manifest, scale):
+            def report(filename, digest, error):
+                filepath = os.path.join(output_dir, filename)
+                if error is not None:
+                    failed.append(filename)
+                    print(f"✗ Failed: {filename} ({error})")
+                    return
+                variants = resample.write_variants(filepath, scale, args.densities, args.widths)
+                written.append(filepath)
+                written.extend(os.path.join(output_dir, variant) for variant in variants)
+                manifest.record(filename, digest)
+                print(f"✓ Rendered: {filename}" + (f" (+{len(variants)} variants)" if variants else ""))
+            return report
+
+        report_signature = finish(args.signature_dir, self.signature_manifest, generate_signatures.device_scale_factor)
+        report_letterhead = finish(args.letterhead_dir, self.letterhead_manifest, generate_letterhead.device_scale_factor)
+        jobs = list(self.signature_jobs(force))
+        letterhead = self.letterhead_job(force)
+        letterhead_path = os.path.join(args.letterhead_dir, generate_letterhead.letterhead_filename)
+
+        if args.backend == "pillow":
+            # In-process, so the font cache stays warm from one save to the next
+            for member, _, filename, digest in jobs:
+                try:
+                    pillow_renderer.save_signature(
+                        member, os.path.join(args.signature_dir, filename), generate_signatures.device_scale_factor,
+                    )
+                    report_signature(filename, digest, None)
+                except Exception as exc:
+                    report_signature(filename, digest, exc)
+            if letterhead is not None:
+                try:
+                    pillow_renderer.save_letterhead(letterhead_path, generate_letterhead.device_scale_factor)
+                    report_letterhead(generate_letterhead.letterhead_filename, letterhead[1], None)
+                except Exception as exc:
+                    report_letterhead(generate_letterhead.letterhead_filename, letterhead[1], exc)
+        elif jobs or letterhead is not None:
+            try:
+                await self.browser.ensure()
+            except Exception as exc:
+                # Keep watching with the manifests as they were; the next build relaunches
+                print(f"✗ Could not start the browser: {exc}")
+                await self.browser.close()
+                return 0, len(jobs) + (letterhead is not None)
+            if jobs:
+                await generate_signatures.render_on_pages(
+                    self.browser.signature_pages, jobs, args.signature_dir, report_signature,
+                    sheet_size=args.sheet_size,
+                )
+            if letterhead is not None:
+                try:
+                    page = await self.browser.letterhead_page()
+                    await generate_letterhead.capture_letterhead_async(page, letterhead[0], letterhead_path)
+                    report_letterhead(generate_letterhead.letterhead_filename, letterhead[1], None)
+                except Exception as exc:
+                    report_letterhead(generate_letterhead.letterhead_filename, letterhead[1], exc)
+
+        self.signature_manifest.save()
+        self.letterhead_manifest.save()
+        if (args.optimize or args.webp) and written:
+            png_encode.optimize_files(written, webp=args.webp, optimize=args.optimize)
+        return len(written), len(failed)
+
+    async def rebuild(self, force=False):
+        """One build, retried once on a fresh browser if any render failed."""
+        start = time.perf_counter()
+        rendered, failed = await self.build(force)
+        if failed and self.browser is not None:
+            print(f"Restarting the browser and retrying {failed} failed renders")
+            await self.browser.close()
+            retried, failed = await self.build()
+            rendered += retried
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if rendered or failed:
+            print(f"Rebuilt {rendered} outputs in {elapsed_ms:.0f} ms" + (f", {failed} failed" if failed else ""))
+
+def reload_templates(changed):
+    """Re-import every template module whose source changed; returns the ones reloaded."""
+    reloaded = []
+    for module in TEMPLATE_MODULES:
+        if os.path.abspath(module.__file__) not in changed:
+            continue
+        try:
+            importlib.reload(module)
+            reloaded.append(module)
+        except Exception as exc:
+            # Mid-edit syntax errors keep the last good version running
+            print(f"✗ Could not reload {os.path.basename(module.__file__)}: {exc}")
+    return reloaded
+
+async def serve(daemon, watcher, stop):
+    """Build once, then rebuild after every change until stop is set."""
+    await daemon.rebuild()
+    print(f"Watching {len(watcher.mtimes)} files (Ctrl+C to stop)")
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), POLL_INTERVAL)
+            break
+        except asyncio.TimeoutError:
+            pass
+        changed = watcher.changed()
+        if not changed:
+            continue
+        # Let multi-step saves finish before reading the files
+        while True:
+            await asyncio.sleep(SETTLE_TIME)
+            more = watcher.changed()
+            if not more:
+                break
+            changed |= more
+        print()
+        print("Changed: " + ", ".join(sorted(os.path.basename(path) for path in changed)))
+        reloaded = reload_templates(changed)
+        # The Pillow fingerprint can't see drawing-code edits, so re-render everything
+        await daemon.rebuild(force=daemon.args.backend == "pillow" and pillow_renderer in reloaded)
+
+async def watch(args):
+    # Finish the current build, save the manifests and close Chromium on Ctrl+C or SIGTERM
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    paths = [os.path.abspath(module.__file__) for module in TEMPLATE_MODULES]
+    # html_template recompiles the signature document itself once its mtime moves
+    paths.append(generate_signatures.signature_template)
+    if args.roster:
+        paths.append(os.path.abspath(args.roster))
+    paths.extend(os.path.abspath(path) for path in args.watch)
+    watcher = SourceWatcher(paths)
+
+    if args.backend == "pillow":
+        await serve(AssetDaemon(args), watcher, stop)
+    else:
+        from playwright.async_api import async_playwright
+        async with async_playwright() as p:
+            browser = WarmBrowser(p, args.concurrency)
+            try:
+                await serve(AssetDaemon(args, browser), watcher, stop)
+            finally:
+                await browser.close()
+    print("Stopped")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep the signature and letterhead renderers warm and rebuild on every save.",
+    )
+    parser.add_argument(
+        "--backend", choices=["chromium", "pillow"], default="chromium",
+        help="render through headless Chromium or draw directly with Pillow",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=min(4, os.cpu_count() or 1),
+        help="number of browser pages kept open for signatures",
+    )
+    parser.add_argument(
+        "--sheet-size", type=int, default=0,
+        help="lay out this many changed members in one document (default: one document per member)",
+    )
+    roster.add_roster_arguments(parser)
+    resample.add_variant_arguments(parser)
+    png_encode.add_encode_arguments(parser)
+    parser.add_argument(
+        "--watch", action="append", default=[], metavar="PATH",
+        help="extra file whose changes trigger a rebuild (repeatable)",
+    )
+    parser.add_argument(
+        "--signature-dir", default="/Users/mateodervishi/Desktop/Email Signatures",
+        help="where to write the signature PNGs",
+    )
+    parser.add_argument(
+        "--letterhead-dir", default="/Users/mateodervishi/Desktop/email signature and letterheads",
+        help="where to write the letterhead PNG",
+    )
+    args = parser.parse_args()
+    if args.roster == "-":
+        parser.error("watch mode needs a roster file, not stdin")
+
+    os.makedirs(args.signature_dir, exist_ok=True)
+    os.makedirs(args.letterhead_dir, exist_ok=True)
+    asyncio.run(watch(args))
+
+if __name__ == "__main__":
+    main()
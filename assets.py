@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the House of Clarence asset generators.
+A subcommand imports its generator only when it runs, so --help stays
+instant and Pillow-only builds never load Playwright.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+# Subcommand -> (module, help); each module's own main() parses the rest of the line
+COMMANDS = {
+    "favicons": ("generate_favicons", "favicon and apple-touch-icon PNGs"),
+    "logos": ("generate_logos", "HOC wordmark PNGs in black and white"),
+    "signatures": ("generate_signatures", "email signature PNGs for the team roster"),
+    "letterhead": ("generate_letterhead", "the letterhead PNG"),
+    "responsive": ("generate_responsive_images", "responsive WebP/AVIF variants of public/ photos"),
+    "watch": ("asset_daemon", "keep the signature and letterhead renderers warm and rebuild on save"),
+    "benchmark": ("benchmark_assets", "time every generator in isolation"),
+    "check": ("visual_regression", "compare fresh renders against a golden set of PNGs"),
+}
+
+# What `all` builds, in order
+ALL_COMMANDS = ("favicons", "logos", "signatures", "letterhead")
+
+def run_command(name, argv):
+    """Import one generator and run its main() as if it had been invoked directly."""
+    module = importlib.import_module(COMMANDS[name][0])
+    saved = sys.argv
+    sys.argv = [f"{os.path.basename(saved[0])} {name}"] + list(argv)
+    try:
+        module.main()
+    finally:
+        sys.argv = saved
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build House of Clarence brand assets.",
+        epilog="Run '%(prog)s <command> --help' for the options of one command.",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (_, summary) in COMMANDS.items():
+        # Options (and -h) are left for the generator's own parser
+        commands.add_parser(name, help=summary, add_help=False)
+    all_parser = commands.add_parser("all", help="favicons, logos, signatures and letterhead in turn")
+    all_parser.add_argument("--force", action="store_true", help="rebuild every asset even if unchanged")
+    all_parser.add_argument(
+        "--no-optimize", action="store_true",
+        help="keep the default PNG encoding instead of picking the smallest one",
+    )
+    all_parser.add_argument("--webp", action="store_true", help="also write a lossless WebP next to every PNG")
+
+    args, rest = parser.parse_known_args()
+    if args.command != "all":
+        run_command(args.command, rest)
+        return
+    if rest:
+        all_parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    shared = [flag for flag, on in (("--force", args.force), ("--no-optimize", args.no_optimize), ("--webp", args.webp)) if on]
+    for name in ALL_COMMANDS:
+        print(f"=== {name} ===")
+        run_command(name, shared)
+        print()
+
+if __name__ == "__main__":
+    main()
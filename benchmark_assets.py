@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the asset generators.
+Each case runs in a fresh Python process so wall time, CPU time and peak
+RSS are measured in isolation; results are written as JSON and can be
+compared against an earlier run to catch regressions.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ERROR_LINE = re.compile(r"^[\w.]+: ")
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the generators' progress output while a case runs."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def _run_main(module, argv):
+    saved = sys.argv
+    sys.argv = [module.__file__] + argv
+    try:
+        with _quiet():
+            module.main()
+    finally:
+        sys.argv = saved
+
+# Each case is (setup, run): setup(tmpdir) returns state, run(state) does the timed work
+
+def favicon_case():
+    def setup(tmpdir):
+        import generate_favicons
+        generate_favicons.public_dir = tmpdir
+        return generate_favicons
+
+    def run(module):
+        for size in module.sizes:
+            module.create_favicon(size, (255, 255, 255, 255), (10, 10, 10, 255), f"favicon-white-{size}.png")
+    return setup, run
+
+def logo_case():
+    def setup(tmpdir):
+        import generate_logos
+        generate_logos.logos_dir = tmpdir
+        return generate_logos
+
+    def run(module):
+        for font_size, width, height in module.sizes:
+            module.create_logo("HOC", font_size, width, height, (10, 10, 10, 255), f"HOC-black-{font_size}px.png")
+    return setup, run
+
+def signature_html_case():
+    def setup(tmpdir):
+        import generate_signatures
+        return generate_signatures
+
+    def run(module):
+        for member in module.team_members:
+            module.generate_signature_html(member)
+    return setup, run
+
+def signatures_run_case(backend):
+    def setup(tmpdir):
+        import generate_signatures
+        return generate_signatures, tmpdir
+
+    def run(state):
+        module, tmpdir = state
+        # --cache "" so $HOC_RENDER_CACHE can't turn the timed render into a copy
+        _run_main(module, ["--output-dir", tmpdir, "--force", "--no-optimize", "--cache", "", "--backend", backend])
+    return setup, run
+
+def letterhead_case(backend):
+    def setup(tmpdir):
+        import generate_letterhead
+        return generate_letterhead, tmpdir
+
+    def run(state):
+        module, tmpdir = state
+        # --cache "" so $HOC_RENDER_CACHE can't turn the timed render into a copy
+        _run_main(module, ["--output-dir", tmpdir, "--force", "--no-optimize", "--cache", "", "--backend", backend])
+    return setup, run
+
+CASES = {
+    "favicon": favicon_case,
+    "logo": logo_case,
+    "signature-html": signature_html_case,
+    "signatures-chromium": lambda: signatures_run_case("chromium"),
+    "signatures-pillow": lambda: signatures_run_case("pillow"),
+    "letterhead-chromium": lambda: letterhead_case("chromium"),
+    "letterhead-pillow": lambda: letterhead_case("pillow"),
+}
+
+def _cpu_time():
+    """CPU seconds of this process plus every child it has reaped (pool workers, the browser)."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def run_case_in_process(name, repeat):
+    """Child side: run one case and print per-iteration timings as JSON."""
+    sys.path.insert(0, SCRIPT_DIR)
+    setup, run = CASES[name]()
+    samples = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        import build_manifest
+        # Throwaway output dirs get throwaway manifests
+        build_manifest.MANIFEST_DIR = os.path.join(tmpdir, "manifests")
+        state = setup(tmpdir)
+        for _ in range(repeat):
+            wall_start = time.perf_counter()
+            cpu_start = _cpu_time()
+            run(state)
+            samples.append({
+                "wall": time.perf_counter() - wall_start,
+                "cpu": _cpu_time() - cpu_start,
+            })
+    json.dump(samples, sys.stdout)
+
+def _peak_rss_bytes(rusage):
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+
+def measure_case(name, repeat):
+    """Parent side: run a case in a fresh interpreter and collect its timings and peak RSS."""
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--run-case", name, "--repeat", str(repeat)],
+            stdout=subprocess.PIPE, stderr=stderr,
+        )
+        stdout = proc.stdout.read()
+        proc.stdout.close()
+        # wait4 gives the resource usage of exactly this child
+        _, status, rusage = os.wait4(proc.pid, 0)
+        returncode = os.waitstatus_to_exitcode(status)
+        # Reaped here, so Popen must not think the child is still running
+        proc.returncode = returncode
+        stderr.seek(0)
+        error_output = stderr.read()
+
+    result = {
+        "case": name, "repeat": repeat, "peak_rss": _peak_rss_bytes(rusage),
+        # Whole child including imports and setup, and its reaped workers
+        "cpu_total": rusage.ru_utime + rusage.ru_stime,
+    }
+    if returncode != 0:
+        lines = error_output.decode(errors="replace").strip().splitlines()
+        # The exception line, not whatever banner the library printed after it
+        errors = [line for line in lines if ERROR_LINE.match(line)]
+        result["error"] = (errors or lines or ["failed"])[-1]
+        return result
+
+    samples = json.loads(stdout)
+    walls = sorted(sample["wall"] for sample in samples)
+    cpus = sorted(sample["cpu"] for sample in samples)
+    result.update({
+        "wall_median": walls[len(walls) // 2],
+        "wall_min": walls[0],
+        "cpu_median": cpus[len(cpus) // 2],
+        "samples": samples,
+    })
+    return result
+
+def environment():
+    """Machine details stored with every run so results are only compared like for like."""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def compare(results, baseline_path, threshold):
+    """Print the change against a baseline run; returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = {case["case"]: case for case in json.load(f)["cases"]}
+    regressions = 0
+    print()
+    print(f"Compared with {baseline_path}:")
+    for case in results:
+        before = baseline.get(case["case"])
+        if not before or "error" in before or "error" in case:
+            continue
+        change = case["wall_median"] / before["wall_median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  ← regression"
+            regressions += 1
+        print(f"  {case['case']:<22} {change:+7.1%} wall{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the House of Clarence asset generators.")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--repeat", type=int, default=5, help="timed iterations per case")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown counted as a regression")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        run_case_in_process(args.run_case, args.repeat)
+        return
+
+    names = args.cases or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    print(f"{'case':<22} {'wall (median)':>14} {'cpu (median)':>13} {'peak RSS':>10}")
+    print("-" * 62)
+    results = []
+    for name in names:
+        result = measure_case(name, args.repeat)
+        results.append(result)
+        if "error" in result:
+            print(f"{name:<22} failed: {result['error']}")
+        else:
+            print(
+                f"{name:<22} {result['wall_median'] * 1000:>11.2f} ms {result['cpu_median'] * 1000:>10.2f} ms "
+                f"{result['peak_rss'] / 2**20:>7.1f} MB"
+            )
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "cases": results}, f, indent=2)
+    print()
+    print(f"Results written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Content-hash manifest for incremental asset builds.
+Each output directory has a manifest of the input hash every file was
+rendered from, so re-runs only render outputs whose inputs changed.
+Manifests are kept beside the scripts rather than in the output directories,
+which (like public/) are published as they are.
+"""
+
+from functools import lru_cache
+import hashlib
+import json
+import os
+
+# Bump when a change to the generators should invalidate every output
+TOOL_VERSION = "1"
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_DIR = os.path.join(SCRIPT_DIR, ".asset-manifests")
+
+# Where manifests used to live, inside the output directory; moved out on the next save
+LEGACY_MANIFEST_NAME = ".asset-manifest.json"
+
+def manifest_path(output_dir):
+    """The manifest file for an output directory, keyed by its absolute path."""
+    output_dir = os.path.abspath(output_dir)
+    key = hashlib.sha256(output_dir.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MANIFEST_DIR, f"{os.path.basename(output_dir)}-{key}.json")
+
+@lru_cache(maxsize=32)
+def file_digest(path):
+    """SHA-256 of a file's bytes, or a fixed marker when there is no file."""
+    if path is None:
+        return "none"
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def input_hash(*parts):
+    """Hash the inputs of one output: template HTML, drawing parameters, member record, etc."""
+    digest = hashlib.sha256(TOOL_VERSION.encode())
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+class Manifest:
+    """Maps output filenames to the input hash they were last rendered from."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = manifest_path(output_dir)
+        self.legacy_path = os.path.join(output_dir, LEGACY_MANIFEST_NAME)
+        self.entries = {}
+        for path in (self.path, self.legacy_path):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f).get("outputs", {})
+            except (OSError, ValueError):
+                # A corrupt manifest just means a full rebuild
+                self.entries = {}
+            break
+
+    def is_current(self, filename, digest):
+        """True when the file exists and was rendered from these exact inputs."""
+        return (
+            self.entries.get(filename) == digest
+            and os.path.exists(os.path.join(self.output_dir, filename))
+        )
+
+    def record(self, filename, digest):
+        self.entries[filename] = digest
+
+    def save(self):
+        """Write the manifest atomically, and drop any old copy left in the output directory."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"tool_version": TOOL_VERSION, "output_dir": os.path.abspath(self.output_dir), "outputs": self.entries},
+                f, indent=2, sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+        try:
+            os.remove(self.legacy_path)
+        except FileNotFoundError:
+            pass
+
+def add_force_argument(parser):
+    """Add the shared --force option to a script's argument parser."""
+    parser.add_argument(
+        "--force", action="store_true",
+        help="render every output even if its inputs are unchanged",
+    )
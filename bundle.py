@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Streaming archive export.
+Rendered files go straight from memory into a ZIP or tar archive, on disk or
+on stdout, as they are produced; an index.json and index.html describing
+every entry are appended last. Nothing round-trips through loose files.
+"""
+
+import hashlib
+import html
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+
+FORMATS = ("zip", "tar", "tgz")
+
+# Already-compressed entries are stored rather than deflated again
+STORED_EXTENSIONS = (".png", ".webp", ".avif")
+
+def bundle_format(target):
+    """Archive format from the target's extension; stdout defaults to zip."""
+    name = target.lower()
+    if name.endswith((".tar.gz", ".tgz")):
+        return "tgz"
+    if name.endswith(".tar"):
+        return "tar"
+    return "zip"
+
+class Bundle:
+    """Write entries into one archive at target ("-" for stdout)."""
+
+    def __init__(self, target, fmt=None):
+        self.target = target
+        self.format = fmt or bundle_format(target)
+        self.entries = []
+        self.mtime = time.time()
+        if target == "-":
+            self._tmp_path = None
+            self._file = sys.stdout.buffer
+        else:
+            # Written beside the target and renamed on close, so a failed run leaves no half archive
+            self._tmp_path = f"{target}.{os.getpid()}.tmp"
+            self._file = open(self._tmp_path, "wb")
+        if self.format == "zip":
+            # zipfile falls back to data descriptors when the stream can't seek (a pipe)
+            self._archive = zipfile.ZipFile(self._file, "w")
+        else:
+            mode = "w|gz" if self.format == "tgz" else "w|"
+            self._archive = tarfile.open(fileobj=self._file, mode=mode)
+
+    def _write(self, name, data):
+        if self.format == "zip":
+            info = zipfile.ZipInfo(name, time.localtime(self.mtime)[:6])
+            info.compress_type = zipfile.ZIP_STORED if name.endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(self.mtime)
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def add(self, name, data, **details):
+        """Append one file; details (member record, variant_of, ...) go into the index."""
+        # Entries stay inside the directory the archive is extracted into
+        parts = name.replace("\\", "/").split("/")
+        if name.startswith("/") or ".." in parts or not all(parts):
+            raise ValueError(f"unsafe archive entry name {name!r}")
+        self._write(name, data)
+        self.entries.append({"file": name, "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest(), **details})
+
+    def index_html(self, title):
+        rows = []
+        for entry in self.entries:
+            if entry.get("variant_of") or not entry["file"].endswith(".png"):
+                continue
+            member = entry.get("member") or {}
+            name = html.escape(entry["file"], quote=True)
+            rows.append(
+                f'<tr><td><img src="{name}" alt="" style="max-width:480px"></td>'
+                f'<td>{html.escape(member.get("name", ""))}<br>{html.escape(member.get("role", ""))}</td>'
+                f'<td><a href="{name}">{name}</a></td></tr>'
+            )
+        return (
+            f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(title)}</title></head>\n'
+            f'<body><h1>{html.escape(title)}</h1>\n<table>\n' + "\n".join(rows) + '\n</table></body></html>\n'
+        )
+
+    def close(self, title="House of Clarence assets"):
+        """Append the index files and finish the archive."""
+        index = {"title": title, "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.mtime)), "files": self.entries}
+        self._write("index.json", json.dumps(index, indent=2).encode("utf-8"))
+        self._write("index.html", self.index_html(title).encode("utf-8"))
+        self._archive.close()
+        self._file.flush()
+        if self._tmp_path:
+            self._file.close()
+            os.replace(self._tmp_path, self.target)
+
+    def abort(self):
+        """Drop a partly written archive."""
+        try:
+            self._archive.close()
+        except Exception:
+            pass
+        if self._tmp_path:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+def add_bundle_arguments(parser):
+    """Add the shared --bundle/--bundle-format options to a script's argument parser."""
+    parser.add_argument(
+        "--bundle", metavar="PATH",
+        help="stream every PNG plus index.json/index.html into one archive instead of "
+             "writing files ('-' for stdout)",
+    )
+    parser.add_argument(
+        "--bundle-format", choices=FORMATS,
+        help="archive format (default: from the --bundle extension, zip for stdout)",
+    )
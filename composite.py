@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Colourway compositing from a single rendered alpha mask.
+The text coverage is drawn once per size; every fill/background
+combination is then produced with NumPy array operations.
+"""
+
+import numpy as np
+from PIL import Image
+
+def colourize(mask, fill, background=None):
+    """Composite fill over background using mask (mode "L") as text coverage.
+
+    Colours are RGBA tuples; a background of None gives a transparent canvas.
+    """
+    coverage = np.asarray(mask, dtype=np.float32) / 255.0
+    fill = np.asarray(fill, dtype=np.float32)
+    fill_alpha = coverage * (fill[3] / 255.0)
+
+    if background is None:
+        background = (0, 0, 0, 0)
+    background = np.asarray(background, dtype=np.float32)
+    back_alpha = (background[3] / 255.0) * (1.0 - fill_alpha)
+
+    # Porter-Duff "over" with straight (non-premultiplied) alpha
+    alpha = fill_alpha + back_alpha
+    safe_alpha = np.where(alpha > 0, alpha, 1.0)[..., None]
+    rgb = (fill[:3] * fill_alpha[..., None] + background[:3] * back_alpha[..., None]) / safe_alpha
+
+    out = np.empty(mask.size[::-1] + (4,), dtype=np.uint8)
+    out[..., :3] = np.clip(rgb + 0.5, 0, 255)
+    out[..., 3] = np.clip(alpha * 255.0 + 0.5, 0, 255)
+    return Image.fromarray(out, "RGBA")
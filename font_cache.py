@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Shared font and glyph-metrics cache for the Pillow asset generators.
+Fonts are loaded once per (font file, size) and evicted least-recently-used.
+"""
+
+from functools import lru_cache
+import os
+import sys
+from PIL import ImageFont
+
+import font_index
+import render_trace
+
+# Bounded so a large size matrix can't hold every face in memory
+FONT_CACHE_SIZE = 64
+GLYPH_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=32)
+def resolve_font_path(font_paths):
+    """Return the first usable font file from a tuple of candidates, or None.
+
+    A candidate is a file path or a (family, weight[, style]) face looked up in font_index.
+    """
+    for candidate in font_paths:
+        font_path = font_index.find_face(*candidate) if isinstance(candidate, tuple) else candidate
+        if font_path and os.path.exists(font_path):
+            try:
+                ImageFont.truetype(font_path, 10)
+                return font_path
+            except Exception:
+                continue
+    print(f"Warning: no installed font matches {list(font_paths)}; using Pillow's default font", file=sys.stderr)
+    return None
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def load_font(font_path, size):
+    """Load a font keyed by (font file, size); None gives Pillow's default font."""
+    with render_trace.span("font.load", size=size):
+        if font_path is None:
+            return ImageFont.load_default()
+        return ImageFont.truetype(font_path, size)
+
+def get_font(font_paths, size):
+    """Find a font from the candidate list (paths or faces) and load it at the given size."""
+    return load_font(resolve_font_path(tuple(font_paths)), size)
+
+@lru_cache(maxsize=GLYPH_CACHE_SIZE)
+def glyph_bbox(font_path, size, glyph):
+    """Bounding box of a single glyph, as draw.textbbox((0, 0), ...) on an RGBA canvas."""
+    return load_font(font_path, size).getbbox(glyph, mode="L")
+
+def letter_metrics(font_paths, size, text):
+    """Per-letter bounding boxes for text at the given size."""
+    font_path = resolve_font_path(tuple(font_paths))
+    return [glyph_bbox(font_path, size, letter) for letter in text]
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Cross-platform font discovery for the Pillow renderers.
+The project fonts/ directory and the system font directories are scanned
+once into an index of (family, weight, style) -> file, persisted in the
+user cache directory and reused until a scanned directory's mtime changes.
+Fonts in fonts/ win over system fonts, so dropping the brand faces there
+gives the same output on every machine.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_FONT_DIR = os.path.join(SCRIPT_DIR, "fonts")
+
+# Bump when the index format or the naming rules change
+INDEX_VERSION = "1"
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Subfamily words -> CSS weight; checked longest first so "ExtraLight" beats "Light"
+STYLE_WEIGHTS = {
+    "thin": 100, "hairline": 100,
+    "extralight": 200, "ultralight": 200,
+    "light": 300,
+    "regular": 400, "book": 400, "normal": 400, "roman": 400,
+    "medium": 500,
+    "semibold": 600, "demibold": 600,
+    "bold": 700,
+    "extrabold": 800, "ultrabold": 800, "heavy": 800,
+    "black": 900,
+}
+
+_index = None
+
+def system_font_dirs():
+    """Platform font directories, in lookup order."""
+    home = os.path.expanduser("~")
+    if sys.platform == "darwin":
+        return [
+            "/System/Library/Fonts", "/System/Library/Fonts/Supplemental",
+            "/Library/Fonts", os.path.join(home, "Library/Fonts"),
+        ]
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        local = os.environ.get("LOCALAPPDATA", "")
+        return [os.path.join(windir, "Fonts"), os.path.join(local, "Microsoft", "Windows", "Fonts")]
+    return [
+        "/usr/share/fonts", "/usr/local/share/fonts",
+        os.path.join(home, ".local/share/fonts"), os.path.join(home, ".fonts"),
+    ]
+
+def font_dirs():
+    return [PROJECT_FONT_DIR] + system_font_dirs()
+
+def index_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "hoc-assets", "font-index.json")
+
+def face_key(family, weight=400, style="normal"):
+    return f"{family.casefold()}|{weight}|{style}"
+
+def parse_style(subfamily):
+    """(weight, style) from a subfamily name such as "Bold Italic" or "ExtraLight"."""
+    name = subfamily.casefold().replace(" ", "").replace("-", "")
+    style = "italic" if "italic" in name or "oblique" in name else "normal"
+    for word in sorted(STYLE_WEIGHTS, key=len, reverse=True):
+        if word in name:
+            return STYLE_WEIGHTS[word], style
+    return 400, style
+
+def _dir_mtimes(roots):
+    """mtime of every directory under roots; adding or removing a font changes its parent's."""
+    mtimes = {}
+    for root in roots:
+        for dirpath, _, _ in os.walk(root):
+            mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+    return mtimes
+
+def scan(roots):
+    """Map face keys to font files; the first file found for a face wins."""
+    from PIL import ImageFont
+    faces = {}
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Sorted walk so the same tree always yields the same index
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if not filename.lower().endswith(FONT_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    # Collections are indexed by their first face, which is what font_cache loads
+                    family, subfamily = ImageFont.truetype(path, 10).getname()
+                except Exception:
+                    continue
+                if not family:
+                    continue
+                faces.setdefault(face_key(family, *parse_style(subfamily or "")), path)
+    return faces
+
+def _load_cached(path, roots):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION or data.get("roots") != roots:
+        return None
+    if data.get("dirs") != _dir_mtimes(roots):
+        return None
+    return data["faces"]
+
+def _save(path, roots, faces):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "roots": roots, "dirs": _dir_mtimes(roots), "faces": faces}, f)
+    os.replace(tmp_path, path)
+
+def load_index(rebuild=False):
+    """The face index, read from the cache file or rescanned when any font directory changed."""
+    global _index
+    if _index is not None and not rebuild:
+        return _index
+    roots = [root for root in font_dirs() if os.path.isdir(root)]
+    path = index_path()
+    faces = None if rebuild else _load_cached(path, roots)
+    if faces is None:
+        faces = scan(roots)
+        try:
+            _save(path, roots, faces)
+        except OSError:
+            # A read-only cache just means rescanning next time
+            pass
+    _index = faces
+    return faces
+
+def find_face(family, weight=400, style="normal"):
+    """Font file for an exact family, CSS weight and style, or None."""
+    return load_index().get(face_key(family, weight, style))
+
+def index_digest():
+    """Hash of every indexed face (key, file name and size), stable across machines with the same fonts."""
+    import hashlib
+    digest = hashlib.sha256(INDEX_VERSION.encode())
+    for key, path in sorted(load_index().items()):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = None
+        digest.update(f"{key}\0{os.path.basename(path)}\0{size}\n".encode())
+    return digest.hexdigest()
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or rebuild the font discovery index.")
+    parser.add_argument("family", nargs="?", help="only list faces of this family")
+    parser.add_argument("--rebuild", action="store_true", help="rescan every font directory")
+    args = parser.parse_args()
+
+    faces = load_index(rebuild=args.rebuild)
+    for key, path in sorted(faces.items()):
+        family, weight, style = key.split("|")
+        if args.family and family != args.family.casefold():
+            continue
+        print(f"{family:<32} {weight:>4} {style:<7} {path}")
+    print(f"{len(faces)} faces indexed in {index_path()}")
+
+if __name__ == "__main__":
+    main()
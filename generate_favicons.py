@@ -1,38 +1,56 @@
 #!/usr/bin/env python3
-from PIL import Image, ImageDraw, ImageFont
+import argparse
+from functools import lru_cache, partial
+from itertools import chain
+import numpy as np
+from PIL import Image, ImageDraw
 import os
 
+import asset_build
+import composite
+import build_manifest
+import font_cache
+import png_encode
+import render_cache
+import render_trace
+import resample
+
 # Create favicons in public folder
 public_dir = "/Users/mateodervishi/Desktop/House of Clarence Website/public"
 
 # Favicon sizes
 sizes = [16, 32, 48, 180]  # 180 for Apple Touch Icon
 
-# Try to find a font
+# Supersampling factors tried per size; 1 is FreeType's hinted, grid-fitted rendering.
+# Each is scored against a box-filtered high-resolution reference (at most
+# reference_max_edge pixels across) and the cheapest within quality_tolerance
+# of the best score wins
+supersample_candidates = (1, 2, 4)
+reference_scale = 8
+reference_max_edge = 768
+quality_tolerance = 0.05
+# How much distance from the reference counts against blur (see favicon_quality)
+fidelity_weight = 0.25
+
+# Sizes packed into favicon.ico, in the light-mode colourway
+ico_sizes = [16, 32, 48]
+
+# Faces resolved through the font index, first installed wins
 font_paths = [
-    "/System/Library/Fonts/Supplemental/Arial.ttf",
-    "/System/Library/Fonts/Helvetica.ttc",
-    "/System/Library/Fonts/SFNSText.ttf",
+    ("Arial", 400),
+    ("Helvetica", 400),
+    ("Liberation Sans", 400),
+    ("DejaVu Sans", 400),
 ]
 
 def get_font(size):
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            try:
-                return ImageFont.truetype(font_path, size)
-            except:
-                continue
-    return ImageFont.load_default()
+    return font_cache.get_font(font_paths, size)
 
-def create_favicon(size, text_color, bg_color, filename):
-    # Create image at higher resolution for quality
-    scale = 4
-    img = Image.new('RGBA', (size * scale, size * scale), bg_color)
-    draw = ImageDraw.Draw(img)
-    
+@lru_cache(maxsize=32)
+def favicon_layout(size, scale=4):
+    """Work out letter positions once per size; shared by every colour variant."""
     # Font size - 38% of icon size to fit all letters
     font_size = int(size * scale * 0.38)
-    font = get_font(font_size)
     
     # Tighter letter spacing
     letter_spacing = font_size * 0.08
@@ -41,17 +59,12 @@ def create_favicon(size, text_color, bg_color, filename):
     letters = list(text)
     
     # Calculate total width
-    total_width = 0
-    letter_widths = []
-    for letter in letters:
-        bbox = draw.textbbox((0, 0), letter, font=font)
-        width = bbox[2] - bbox[0]
-        letter_widths.append(width)
-        total_width += width
-    total_width += letter_spacing * (len(letters) - 1)
+    bboxes = font_cache.letter_metrics(font_paths, font_size, text)
+    letter_widths = [bbox[2] - bbox[0] for bbox in bboxes]
+    total_width = sum(letter_widths) + letter_spacing * (len(letters) - 1)
     
     # Calculate height for vertical centering
-    bbox = draw.textbbox((0, 0), "H", font=font)
+    bbox = bboxes[letters.index("H")]
     text_height = bbox[3] - bbox[1]
     
     # Starting position (centered)
@@ -59,33 +72,212 @@ def create_favicon(size, text_color, bg_color, filename):
     # Center vertically with slight adjustment for optical balance
     y = (size * scale - text_height) / 2 - (text_height * 0.1)
     
-    # Draw each letter
+    positions = []
     for i, letter in enumerate(letters):
-        draw.text((x, y), letter, font=font, fill=text_color)
+        positions.append((letter, (x, y)))
         x += letter_widths[i] + letter_spacing
+    return font_size, tuple(positions)
+
+@lru_cache(maxsize=32)
+def grid_fitted_layout(size, outline_scale=4):
+    """Letter positions for direct (unscaled) rendering with hinted glyphs.
+
+    Hinting rounds the cap height to whole pixels, so pick the font size whose
+    hinted H is closest to the outline layout's, then put each glyph's ink
+    where the outline layout puts it, snapped to the pixel grid.
+    """
+    text = "HOC"
+    ref_size, ref_positions = favicon_layout(size, outline_scale)
+    ref_boxes = font_cache.letter_metrics(font_paths, ref_size, text)
+    cap = text.index("H")
+    target_cap = (ref_boxes[cap][3] - ref_boxes[cap][1]) / outline_scale
     
-    # Resize down to target size with high-quality resampling
-    img = img.resize((size, size), Image.Resampling.LANCZOS)
+    def cap_error(font_size):
+        box = font_cache.letter_metrics(font_paths, font_size, "H")[0]
+        return abs((box[3] - box[1]) - target_cap)
+    
+    nominal = max(1, round(ref_size / outline_scale))
+    font_size = min(range(max(1, nominal - 2), nominal + 3), key=lambda fs: (cap_error(fs), abs(fs - nominal)))
+    boxes = font_cache.letter_metrics(font_paths, font_size, text)
+    
+    # Shared baseline: align the tops of the caps
+    _, (_, ref_y) = ref_positions[cap]
+    y = round((ref_y + ref_boxes[cap][1]) / outline_scale) - boxes[cap][1]
+    positions = []
+    for (letter, (ref_x, _)), ref_box, box in zip(ref_positions, ref_boxes, boxes):
+        x = round((ref_x + ref_box[0]) / outline_scale) - box[0]
+        positions.append((letter, (x, y)))
+    return font_size, tuple(positions)
+
+def render_favicon_mask(size, scale=4):
+    """Draw the text coverage at size x scale as an "L" mask, shared by every colourway."""
+    mask = Image.new('L', (size * scale, size * scale), 0)
+    draw = ImageDraw.Draw(mask)
+    
+    with render_trace.span("text.layout", size=size):
+        font_size, positions = grid_fitted_layout(size) if scale == 1 else favicon_layout(size, scale)
+        font = get_font(font_size)
+    
+    # Draw each letter
+    with render_trace.span("draw", size=size):
+        for letter, xy in positions:
+            draw.text(xy, letter, font=font, fill=255)
+    return mask
+
+def favicon_quality(mask, reference):
+    """Lower is better: the share of the mask's own ink that is grey (blurred) plus the
+    weighted distance from the reference per unit of reference ink, so every size
+    is scored on the same scale."""
+    a = np.asarray(mask, dtype=np.float32)
+    r = np.asarray(reference, dtype=np.float32)
+    blur = np.minimum(a, 255 - a).sum() / max(float(a.sum()), 1.0)
+    fidelity = np.abs(a - r).sum() / max(float(r.sum()), 1.0)
+    return float(blur + fidelity_weight * fidelity)
+
+def favicon_mask(size):
+    """Render the size x size mask at whichever supersampling factor scores best.
+
+    Returns (factor, mask). Tiny sizes usually pick direct hinted rendering,
+    which keeps 1 px stems sharp instead of smearing them over two pixels.
+    """
+    # Large icons get a smaller reference, and only factors below it compete
+    scale = max(2, min(reference_scale, reference_max_edge // size))
+    with render_trace.span("quality.reference", size=size):
+        reference = render_favicon_mask(size, scale).reduce(scale)
+    candidates = []
+    for factor in [factor for factor in supersample_candidates if factor < scale] or [1]:
+        mask = render_favicon_mask(size, factor)
+        if factor > 1:
+            with render_trace.span("resize", size=size):
+                mask = resample.downsample(mask, (size, size))
+        candidates.append((favicon_quality(mask, reference), factor, mask))
+    best = min(score for score, _, _ in candidates)
+    # Candidates are cheapest first, so the first near-best one is the one to keep
+    for score, factor, mask in candidates:
+        if score <= best + quality_tolerance:
+            return factor, mask
+
+def create_favicon(size, text_color, bg_color, filename):
+    _, mask = favicon_mask(size)
+    with render_trace.span("composite", file=filename):
+        img = composite.colourize(mask, text_color, bg_color)
     
     # Save
     filepath = os.path.join(public_dir, filename)
-    img.save(filepath, 'PNG')
-    print(f"Created: {filename} ({size}x{size})")
+    with render_trace.span("save", file=filename):
+        img.save(filepath, 'PNG')
+    return f"Created: {filename} ({size}x{size})"
+
+def create_favicon_set(sizes, outputs):
+    """Render each size's mask once at its best factor and composite every
+    (size, text colour, background colour, filename) from it.
 
-print("Generating favicons...")
-print("-" * 40)
+    A .ico output lists several sizes and packs one image per size, so it is
+    built from the same masks as the PNGs.
+    """
+    masks = {size: favicon_mask(size) for size in sizes}
+    messages = []
+    for size, text_color, bg_color, filename in outputs:
+        filepath = os.path.join(public_dir, filename)
+        if filename.endswith(".ico"):
+            images = []
+            for ico_size in size:
+                with render_trace.span("composite", file=filename, size=ico_size):
+                    images.append(composite.colourize(masks[ico_size][1], text_color, bg_color))
+            # Largest first; every other size is stored as drawn rather than rescaled
+            images.sort(key=lambda image: image.size, reverse=True)
+            with render_trace.span("save", file=filename):
+                images[0].save(
+                    filepath, format="ICO", sizes=[image.size for image in images], append_images=images[1:],
+                )
+            messages.append(f"Created: {filename} ({', '.join(str(image.width) for image in reversed(images))})")
+            continue
+        factor, mask = masks[size]
+        with render_trace.span("composite", file=filename):
+            img = composite.colourize(mask, text_color, bg_color)
+        with render_trace.span("save", file=filename):
+            img.save(filepath, 'PNG')
+        messages.append(f"Created: {filename} ({size}x{size}, {factor}x)")
+    return messages
 
-# Dark mode favicon (white text on black background)
-for size in sizes:
-    create_favicon(size, (255, 255, 255, 255), (10, 10, 10, 255), f"favicon-white-{size}.png")
+def favicon_jobs():
+    """Jobs run in parallel: (sizes, ((size, text colour, background colour, filename), ...)).
 
-# Light mode favicon (black text on white background)
-for size in sizes:
-    create_favicon(size, (10, 10, 10, 255), (255, 255, 255, 255), f"favicon-black-{size}.png")
+    Each size gets its own job, except ico_sizes, which share one so favicon.ico
+    is packed from their masks in the same pass.
+    """
+    groups = [tuple(ico_sizes)] + [(size,) for size in sizes if size not in ico_sizes]
+    jobs = []
+    for group in groups:
+        outputs = []
+        for size in group:
+            # Dark mode favicon (white text on black background)
+            outputs.append((size, (255, 255, 255, 255), (10, 10, 10, 255), f"favicon-white-{size}.png"))
+            # Light mode favicon (black text on white background)
+            outputs.append((size, (10, 10, 10, 255), (255, 255, 255, 255), f"favicon-black-{size}.png"))
+            if size == 180:
+                # Apple touch icons (need solid background)
+                outputs.append((size, (255, 255, 255, 255), (10, 10, 10, 255), "apple-touch-icon-dark.png"))
+                outputs.append((size, (10, 10, 10, 255), (248, 247, 245, 255), "apple-touch-icon-light.png"))
+        if group == tuple(ico_sizes):
+            # Legacy favicon.ico for browsers that ignore the <link> tags, in the light-mode colourway
+            outputs.append((group, (10, 10, 10, 255), (255, 255, 255, 255), "favicon.ico"))
+        jobs.append((group, tuple(outputs)))
+    return jobs
 
-# Apple touch icons (need solid background)
-create_favicon(180, (255, 255, 255, 255), (10, 10, 10, 255), "apple-touch-icon-dark.png")
-create_favicon(180, (10, 10, 10, 255), (248, 247, 245, 255), "apple-touch-icon-light.png")
+def favicon_outputs(job):
+    return [filename for *_, filename in job[1]]
+
+def favicon_hash(job):
+    """Hash of everything a favicon is drawn from."""
+    font_path = font_cache.resolve_font_path(tuple(font_paths))
+    return build_manifest.input_hash(
+        "favicon", job, supersample_candidates, reference_scale, reference_max_edge, quality_tolerance,
+        fidelity_weight, build_manifest.file_digest(font_path),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate House of Clarence favicons.")
+    asset_build.add_workers_argument(parser)
+    build_manifest.add_force_argument(parser)
+    png_encode.add_encode_arguments(parser)
+    render_cache.add_cache_arguments(parser)
+    render_trace.add_trace_argument(parser)
+    args = parser.parse_args()
+    render_trace.start_from_args(args)
+    cache = render_cache.from_args(args, render_cache.pillow_fingerprint())
+    
+    print("Generating favicons...")
+    print("-" * 40)
+    
+    encoding = partial(png_encode.encode_hash, optimize=args.optimize, webp=args.webp)
+    # One mask per size at its best factor; every colourway is composited from it
+    messages, skipped = asset_build.build(
+        create_favicon_set, favicon_jobs(), public_dir, favicon_hash,
+        workers=args.workers, force=args.force, job_outputs=favicon_outputs, cache=cache,
+        manifest_hash=encoding,
+    )
+    for message in chain.from_iterable(messages):
+        print(message)
+    if skipped:
+        print(f"Unchanged: {len(skipped)} favicons skipped")
+    
+    if args.optimize or args.webp:
+        skipped = set(skipped)
+        written = [
+            os.path.join(public_dir, filename)
+            for job in favicon_jobs() for filename in favicon_outputs(job)
+            if filename not in skipped and filename.endswith(".png")
+        ]
+        results = png_encode.optimize_files(written, args.workers, args.webp, optimize=args.optimize)
+        if args.optimize:
+            png_encode.print_report(results)
+    
+    print("-" * 40)
+    print("Done! Favicons saved to public folder")
+    if cache is not None:
+        print(cache.finish("favicons"))
+    render_trace.finish_from_args(args)
 
-print("-" * 40)
-print("Done! Favicons saved to public folder")
+if __name__ == "__main__":
+    main()
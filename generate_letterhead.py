@@ -4,8 +4,26 @@ Generate letterhead PNG for House of Clarence.
 High-quality 3x resolution for crisp output.
 """
 
+import argparse
+from fractions import Fraction
 import os
-from playwright.sync_api import sync_playwright
+
+import build_manifest
+import png_encode
+import render_cache
+import render_ready
+import render_trace
+import resample
+
+# Render settings (3x device scale factor for crisp output)
+viewport = {"width": 650, "height": 900}
+device_scale_factor = 3
+letterhead_filename = "HOC_Letterhead.png"
+
+# Print mode (--dpi): the 595x842 letterhead is A4 in points, captured in
+# bands of about this many device rows and streamed into the PNG
+print_band_rows = 512
+print_pdf_filename = "HOC_Letterhead.pdf"
 
 def generate_letterhead_html():
     """Generate HTML for the letterhead."""
@@ -167,51 +185,265 @@ def generate_letterhead_html():
 </body>
 </html>'''
 
+def letterhead_hash(html_content, backend="chromium"):
+    """Hash of everything the letterhead PNG is rendered from."""
+    if backend == "pillow":
+        import pillow_renderer
+        return build_manifest.input_hash("letterhead-pillow", device_scale_factor, pillow_renderer.fingerprint())
+    return build_manifest.input_hash("letterhead", html_content, device_scale_factor, viewport)
+
+def print_filename(dpi):
+    return f"{os.path.splitext(letterhead_filename)[0]}-{dpi}dpi.png"
+
+def band_height(scale):
+    """Band height in CSS px: a whole number of device rows, about print_band_rows of them."""
+    return max(1, print_band_rows // scale.numerator) * scale.denominator
+
+def print_bands(height, scale):
+    """(top, css height, device rows) bands covering height CSS px at scale.
+
+    Every band but the last is a whole number of device rows tall, so
+    neighbouring captures meet exactly.
+    """
+    step = band_height(scale)
+    total_rows = int(height * scale)
+    bands = []
+    for top in range(0, height, step):
+        css_height = min(step, height - top)
+        rows = min(int(css_height * scale), total_rows - int(top * scale))
+        bands.append((top, css_height, rows))
+    return bands
+
+def capture_print(html_content, dpi, png_path, pdf_path):
+    """Capture the letterhead at dpi band by band into png_path, and print a vector PDF to pdf_path.
+
+    The viewport is one band tall and scrolled down the page, so neither the
+    browser nor this process ever holds the full-resolution image.
+    """
+    import io
+    from PIL import Image
+    from playwright.sync_api import sync_playwright
+    scale = Fraction(dpi, 72)
+    filename = os.path.basename(png_path)
+    with sync_playwright() as p:
+        with render_trace.span("browser.launch"):
+            browser = p.chromium.launch()
+        with render_trace.span("context.new"):
+            # One band tall: the compositor never rasterizes more than a band at print scale
+            context = browser.new_context(
+                viewport={"width": viewport["width"], "height": band_height(scale)},
+                device_scale_factor=float(scale),
+            )
+        with render_trace.span("page.new"):
+            page = context.new_page()
+        with render_trace.span("page.set_content", file=filename):
+            page.set_content(html_content, wait_until="domcontentloaded")
+        with render_trace.span("page.render_ready", file=filename):
+            render_ready.wait_until_ready(page)
+        with render_trace.span("page.query_selector", file=filename):
+            box = page.query_selector(".letterhead").bounding_box()
+        
+        width = int(box["width"] * scale)
+        bands = print_bands(round(box["height"]), scale)
+        writer = png_encode.PngBandWriter(png_path, width, sum(rows for _, _, rows in bands), dpi=dpi)
+        try:
+            for top, css_height, rows in bands:
+                # The browser clamps the scroll near the bottom, so clip relative to where it stopped
+                scroll_y = page.evaluate("y => { window.scrollTo(0, y); return window.scrollY; }", box["y"] + top)
+                render_ready.wait_until_ready(page)
+                clip = {"x": box["x"], "y": box["y"] + top - scroll_y, "width": box["width"], "height": css_height}
+                with render_trace.span("element.screenshot", file=filename, top=top):
+                    data = page.screenshot(type="png", clip=clip, timeout=5000)
+                with Image.open(io.BytesIO(data)) as band:
+                    band = band.convert("RGBA")
+                # Fractional scales can round the capture up a pixel (trim it) or, rarely, down
+                if band.width >= width and band.height >= rows:
+                    band = band.crop((0, 0, width, rows))
+                else:
+                    band = band.resize((width, rows), Image.Resampling.LANCZOS)
+                with render_trace.span("png.band", file=filename, top=top):
+                    writer.write(band)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        
+        # Same page, printed: A4 at 1pt per letterhead CSS px, text and shapes stay vector
+        page.add_style_tag(content="@page { size: A4; margin: 0; }")
+        page.emulate_media(media="screen")
+        with render_trace.span("page.pdf", file=os.path.basename(pdf_path)):
+            page.pdf(
+                path=pdf_path, width="210mm", height="297mm", scale=96 / 72, print_background=True,
+                margin={"top": "0", "right": "0", "bottom": "0", "left": "0"}, page_ranges="1",
+            )
+        page.close()
+        browser.close()
+    return width, writer.height
+
+def build_print(args, html_content, output_dir, cache=None):
+    """--dpi: the print PNG (streamed, never optimized in memory) and the vector PDF."""
+    filenames = [print_filename(args.dpi), print_pdf_filename]
+    paths = [os.path.join(output_dir, filename) for filename in filenames]
+    manifest = build_manifest.Manifest(output_dir)
+    digest = build_manifest.input_hash(letterhead_hash(html_content), "print", args.dpi, print_band_rows)
+    if not args.force and all(manifest.is_current(filename, digest) for filename in filenames):
+        print(f"Unchanged: {', '.join(filenames)} skipped")
+        return
+    
+    keys = [cache.key(digest, filename) for filename in filenames] if cache is not None else []
+    if keys and all(cache.fetch(key, path) for key, path in zip(keys, paths)):
+        print(f"✓ Cached: {', '.join(filenames)}")
+    else:
+        width, height = capture_print(html_content, args.dpi, *paths)
+        print(f"✓ Created: {filenames[0]} ({width}x{height}, {args.dpi} dpi)")
+        print(f"✓ Created: {filenames[1]} (vector, A4)")
+        for key, path in zip(keys, paths):
+            cache.store(key, path)
+    
+    for filename in filenames:
+        manifest.record(filename, digest)
+    manifest.save()
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate the House of Clarence letterhead PNG.")
+    build_manifest.add_force_argument(parser)
+    parser.add_argument(
+        "--backend", choices=["chromium", "pillow"], default="chromium",
+        help="render through headless Chromium or draw directly with Pillow",
+    )
+    resample.add_variant_arguments(parser)
+    png_encode.add_encode_arguments(parser)
+    render_cache.add_cache_arguments(parser)
+    render_trace.add_trace_argument(parser)
+    parser.add_argument(
+        "--dpi", type=int,
+        help="print mode: an A4 PNG at this resolution (e.g. 300 or 600), captured in bands "
+             "with bounded memory, plus a vector PDF",
+    )
+    parser.add_argument(
+        "--output-dir", default="/Users/mateodervishi/Desktop/email signature and letterheads",
+        help="where to write the PNGs",
+    )
+    args = parser.parse_args()
+    if args.dpi and args.backend != "chromium":
+        parser.error("--dpi needs the chromium backend")
+    render_trace.start_from_args(args)
+    environment = render_cache.pillow_fingerprint() if args.backend == "pillow" else render_cache.browser_fingerprint()
+    cache = render_cache.from_args(args, environment)
+    
     # Output directory
-    output_dir = "/Users/mateodervishi/Desktop/email signature and letterheads"
+    output_dir = args.output_dir
     os.makedirs(output_dir, exist_ok=True)
     
-    print("Generating letterhead at 3x resolution...")
+    print(f"Generating letterhead at {f'{args.dpi} dpi' if args.dpi else '3x resolution'}...")
     print(f"Output directory: {output_dir}")
     print()
     
+    # Generate HTML
+    html_content = generate_letterhead_html()
+    
+    if args.dpi:
+        build_print(args, html_content, output_dir, cache)
+        if cache is not None:
+            print(cache.finish("letterhead"))
+        render_trace.finish_from_args(args)
+        return
+    
+    # Filepath
+    filename = letterhead_filename
+    filepath = os.path.join(output_dir, filename)
+    
+    # Skip the browser entirely when nothing changed
+    manifest = build_manifest.Manifest(output_dir)
+    base_digest = letterhead_hash(html_content, args.backend)
+    digest = png_encode.encode_hash(
+        resample.variant_hash(base_digest, args.densities, args.widths), args.optimize, args.webp,
+    )
+    if not args.force and manifest.is_current(filename, digest):
+        print(f"Unchanged: {filename} skipped")
+        return
+    
+    cache_key = cache.key(base_digest, filename) if cache is not None else None
+    data = cache.read(cache_key) if cache_key else None
+    if data is not None:
+        print(f"✓ Cached: {filename}")
+    elif args.backend == "pillow":
+        import pillow_renderer
+        data = pillow_renderer.letterhead_png(device_scale_factor)
+        print(f"✓ Created: {filename} (Pillow)")
+    else:
+        data = capture_letterhead(html_content, filename)
+    if cache_key:
+        cache.write(cache_key, data)
+    
+    # The capture stays in memory: variants are derived from it and every
+    # file is optimized before its one write
+    variants, results = png_encode.save_capture(
+        filepath, data, device_scale_factor, args.densities, args.widths, args.optimize, args.webp,
+    )
+    for variant in variants:
+        print(f"✓ Derived: {variant}")
+    png_encode.print_report(results)
+    
+    manifest.record(filename, digest)
+    manifest.save()
+    
+    print()
+    print(f"Letterhead saved to: {filepath}")
+    print("Resolution: 3x (high-quality retina)")
+    if cache is not None:
+        print(cache.finish("letterhead"))
+    render_trace.finish_from_args(args)
+
+def capture_letterhead(html_content, filename=letterhead_filename):
+    """Screenshot the .letterhead block with headless Chromium; returns the PNG bytes."""
+    from playwright.sync_api import sync_playwright
     with sync_playwright() as p:
-        browser = p.chromium.launch()
+        with render_trace.span("browser.launch"):
+            browser = p.chromium.launch()
         # Use 3x device scale factor for high-DPI/retina quality
-        context = browser.new_context(
-            viewport={"width": 650, "height": 900},
-            device_scale_factor=3
-        )
-        
-        # Generate HTML
-        html_content = generate_letterhead_html()
+        with render_trace.span("context.new"):
+            context = browser.new_context(
+                viewport=viewport,
+                device_scale_factor=device_scale_factor
+            )
         
         # Create page and set content
-        page = context.new_page()
-        page.set_content(html_content, wait_until="domcontentloaded")
+        with render_trace.span("page.new"):
+            page = context.new_page()
+        with render_trace.span("page.set_content", file=filename):
+            page.set_content(html_content, wait_until="domcontentloaded")
         
-        # Brief wait for rendering
-        page.wait_for_timeout(100)
+        # Wait until fonts are loaded and a frame is painted
+        with render_trace.span("page.render_ready", file=filename):
+            wait_ms = render_ready.wait_until_ready(page)
         
         # Get the letterhead element and screenshot it
-        letterhead_element = page.query_selector(".letterhead")
-        
-        # Filepath
-        filepath = os.path.join(output_dir, "HOC_Letterhead.png")
+        with render_trace.span("page.query_selector", file=filename):
+            letterhead_element = page.query_selector(".letterhead")
         
-        # Screenshot at 3x scale
-        letterhead_element.screenshot(path=filepath, type="png", timeout=5000)
+        # Screenshot at 3x scale; the PNG comes back in memory rather than via disk
+        with render_trace.span("element.screenshot", file=filename):
+            data = letterhead_element.screenshot(type="png", timeout=5000)
         
-        print(f"✓ Created: HOC_Letterhead.png")
+        print(f"✓ Created: {filename} (render-ready after {wait_ms:.1f} ms)")
         
         page.close()
         browser.close()
-    
-    print()
-    print(f"Letterhead saved to: {filepath}")
-    print("Resolution: 3x (high-quality retina)")
+    return data
+
+async def capture_letterhead_async(page, html_content, filepath):
+    """Screenshot the .letterhead block on an already-open page (3x context); returns the wait in ms."""
+    filename = os.path.basename(filepath)
+    with render_trace.span("page.set_content", file=filename):
+        await page.set_content(html_content, wait_until="domcontentloaded")
+    with render_trace.span("page.render_ready", file=filename):
+        wait_ms = await render_ready.wait_until_ready_async(page)
+    with render_trace.span("page.query_selector", file=filename):
+        letterhead_element = await page.query_selector(".letterhead")
+    with render_trace.span("element.screenshot", file=filename):
+        await letterhead_element.screenshot(path=filepath, type="png", timeout=5000)
+    return wait_ms
 
 if __name__ == "__main__":
     main()
-
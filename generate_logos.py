@@ -1,10 +1,21 @@
 #!/usr/bin/env python3
-from PIL import Image, ImageDraw, ImageFont
+import argparse
+from functools import lru_cache, partial
+import importlib.util
+from itertools import chain
+from PIL import Image, ImageDraw
 import os
 
-# Create logos directory
+import asset_build
+import composite
+import build_manifest
+import font_cache
+import png_encode
+import render_cache
+import render_trace
+
+# Logos directory
 logos_dir = "/Users/mateodervishi/Desktop/House of Clarence Website/public/logos"
-os.makedirs(logos_dir, exist_ok=True)
 
 # Sizes configuration (size, canvas_width, canvas_height)
 sizes = [
@@ -15,74 +26,217 @@ sizes = [
     (24, 100, 50),
 ]
 
+# Render at 2x for quality
+supersample = 2
+
 # Try to find Inter font, fall back to system fonts
 font_paths = [
-    "/System/Library/Fonts/Supplemental/Arial.ttf",
-    "/System/Library/Fonts/Helvetica.ttc",
-    "/System/Library/Fonts/SFNSText.ttf",
-    "/Library/Fonts/SF-Pro-Text-Light.otf",
+    ("Arial", 400),
+    ("Helvetica", 400),
+    ("SF Pro Text", 300),
+    ("Liberation Sans", 400),
+    ("DejaVu Sans", 400),
 ]
 
 def get_font(size):
-    # Try each font path
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            try:
-                return ImageFont.truetype(font_path, size)
-            except:
-                continue
-    # Fallback to default
-    return ImageFont.load_default()
+    # Try each font path, falling back to default (cached per font file and size)
+    return font_cache.get_font(font_paths, size)
 
-def create_logo(text, font_size, canvas_width, canvas_height, text_color, filename):
-    # Create transparent image (RGBA) at 2x resolution for quality
-    scale = 2
-    img = Image.new('RGBA', (canvas_width * scale, canvas_height * scale), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+def space_letters(bboxes, letter_spacing, canvas_width, canvas_height):
+    """Draw origins for letters with the given ink boxes: centred as a row, each
+    letter's ink height centred on the canvas midline."""
+    letter_widths = [bbox[2] - bbox[0] for bbox in bboxes]
+    total_width = sum(letter_widths) + letter_spacing * (len(bboxes) - 1)
     
-    # Get font
-    font = get_font(font_size * scale)
+    # Starting x position (centered)
+    x = (canvas_width - total_width) / 2
+    y = canvas_height / 2
     
+    origins = []
+    for i, bbox in enumerate(bboxes):
+        letter_height = bbox[3] - bbox[1]
+        origins.append((x, y - letter_height/2))
+        x += letter_widths[i] + letter_spacing
+    return origins
+
+@lru_cache(maxsize=32)
+def logo_layout(text, font_size, canvas_width, canvas_height, scale):
+    """Work out letter positions once per size; shared by every colour variant."""
     # Add letter spacing by drawing each letter
     letter_spacing = font_size * scale * 0.15
     
-    # Calculate total width with spacing
-    letters = list(text)
-    total_width = 0
-    letter_widths = []
-    for letter in letters:
-        bbox = draw.textbbox((0, 0), letter, font=font)
-        width = bbox[2] - bbox[0]
-        letter_widths.append(width)
-        total_width += width
-    total_width += letter_spacing * (len(letters) - 1)
+    bboxes = font_cache.letter_metrics(font_paths, font_size * scale, text)
+    origins = space_letters(bboxes, letter_spacing, canvas_width * scale, canvas_height * scale)
+    return tuple(zip(text, origins))
+
+def render_logo_mask(text, font_size, canvas_width, canvas_height, source="text"):
+    """Draw the text coverage as an "L" mask at 2x resolution, shared by every colour.
+
+    With source="outlines" the cached glyph outlines are rasterized instead of laying out text.
+    """
+    scale = supersample
+    if source == "outlines":
+        import logo_outlines
+        with render_trace.span("draw", size=font_size):
+            return logo_outlines.render_outline_mask(
+                outline_font_path(), text, font_size * scale, canvas_width * scale, canvas_height * scale,
+            )
+    mask = Image.new('L', (canvas_width * scale, canvas_height * scale), 0)
+    draw = ImageDraw.Draw(mask)
     
-    # Starting x position (centered)
-    x = (canvas_width * scale - total_width) / 2
-    y = (canvas_height * scale) / 2
+    # Get font
+    with render_trace.span("text.layout", size=font_size):
+        font = get_font(font_size * scale)
+        positions = logo_layout(text, font_size, canvas_width, canvas_height, scale)
     
     # Draw each letter
-    for i, letter in enumerate(letters):
-        bbox = draw.textbbox((0, 0), letter, font=font)
-        letter_height = bbox[3] - bbox[1]
-        draw.text((x, y - letter_height/2), letter, font=font, fill=text_color)
-        x += letter_widths[i] + letter_spacing
+    with render_trace.span("draw", size=font_size):
+        for letter, xy in positions:
+            draw.text(xy, letter, font=font, fill=255)
+    return mask
+
+def create_logo(text, font_size, canvas_width, canvas_height, text_color, filename):
+    # Transparent image (RGBA) at 2x resolution for quality
+    mask = render_logo_mask(text, font_size, canvas_width, canvas_height)
+    with render_trace.span("composite", file=filename):
+        img = composite.colourize(mask, text_color)
     
     # Save
     filepath = os.path.join(logos_dir, filename)
-    img.save(filepath, 'PNG')
-    print(f"Created: {filename}")
+    with render_trace.span("save", file=filename):
+        img.save(filepath, 'PNG')
+    return f"Created: {filename}"
+
+def create_logo_set(text, font_size, canvas_width, canvas_height, outputs, source="text"):
+    """Draw the mask once and composite every (colour, filename) from it."""
+    mask = render_logo_mask(text, font_size, canvas_width, canvas_height, source)
+    
+    messages = []
+    for text_color, filename in outputs:
+        with render_trace.span("composite", file=filename):
+            img = composite.colourize(mask, text_color)
+        filepath = os.path.join(logos_dir, filename)
+        with render_trace.span("save", file=filename):
+            img.save(filepath, 'PNG')
+        messages.append(f"Created: {filename}")
+    return messages
+
+def create_logo_masters(text, font_size, canvas_width, canvas_height, outputs):
+    """Write each (colour, filename) as an SVG or PDF drawn from the glyph outlines."""
+    import logo_outlines
+    font_path = outline_font_path()
+    messages = []
+    for text_color, filename in outputs:
+        filepath = os.path.join(logos_dir, filename)
+        with render_trace.span("save", file=filename):
+            if filename.endswith(".pdf"):
+                with open(filepath, "wb") as f:
+                    f.write(logo_outlines.logo_pdf(font_path, text, font_size, canvas_width, canvas_height, text_color))
+            else:
+                with open(filepath, "w", encoding="utf-8") as f:
+                    f.write(logo_outlines.logo_svg(font_path, text, font_size, canvas_width, canvas_height, text_color))
+        messages.append(f"Created: {filename}")
+    return messages
+
+def outline_font_path():
+    font_path = font_cache.resolve_font_path(tuple(font_paths))
+    if font_path is None:
+        raise RuntimeError("vector logos need an installed outline font, not Pillow's default")
+    return font_path
+
+def logo_jobs(source="text"):
+    """One job per size: (text, size, canvas width, canvas height, ((colour, filename), ...), source)."""
+    jobs = []
+    for font_size, width, height in sizes:
+        outputs = (
+            # Black text
+            ((10, 10, 10, 255), f"HOC-black-{font_size}px.png"),
+            # White text
+            ((255, 255, 255, 255), f"HOC-white-{font_size}px.png"),
+        )
+        jobs.append(("HOC", font_size, width, height, outputs, source))
+    return jobs
 
-# Generate all logos
-print("Generating HOC logos...")
-print("-" * 40)
+def master_jobs(pdf=False):
+    """The resolution-independent masters, laid out on the largest size's canvas."""
+    font_size, width, height = sizes[0]
+    outputs = []
+    for name, color in (("black", (10, 10, 10, 255)), ("white", (255, 255, 255, 255))):
+        outputs.append((color, f"HOC-{name}.svg"))
+        if pdf:
+            outputs.append((color, f"HOC-{name}.pdf"))
+    return [("HOC", font_size, width, height, tuple(outputs))]
 
-for font_size, width, height in sizes:
-    # Black text
-    create_logo("HOC", font_size, width, height, (10, 10, 10, 255), f"HOC-black-{font_size}px.png")
-    # White text
-    create_logo("HOC", font_size, width, height, (255, 255, 255, 255), f"HOC-white-{font_size}px.png")
+def logo_outputs(job):
+    return [filename for _, filename in job[4]]
 
-print("-" * 40)
-print(f"Done! 10 PNG files saved to: {logos_dir}")
+def logo_hash(job):
+    """Hash of everything a logo is drawn from."""
+    font_path = font_cache.resolve_font_path(tuple(font_paths))
+    return build_manifest.input_hash("logo", job, supersample, build_manifest.file_digest(font_path))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate House of Clarence HOC logos.")
+    asset_build.add_workers_argument(parser)
+    build_manifest.add_force_argument(parser)
+    png_encode.add_encode_arguments(parser)
+    render_cache.add_cache_arguments(parser)
+    render_trace.add_trace_argument(parser)
+    parser.add_argument(
+        "--vector", action="store_true",
+        help="write SVG masters and rasterize every PNG from the cached glyph outlines (needs fontTools)",
+    )
+    parser.add_argument("--pdf", action="store_true", help="also write PDF masters (implies --vector)")
+    args = parser.parse_args()
+    args.vector = args.vector or args.pdf
+    if args.vector and importlib.util.find_spec("fontTools") is None:
+        parser.error("--vector needs fontTools (pip install fonttools)")
+    render_trace.start_from_args(args)
+    cache = render_cache.from_args(args, render_cache.pillow_fingerprint())
+    
+    os.makedirs(logos_dir, exist_ok=True)
+    
+    # Generate all logos
+    print("Generating HOC logos...")
+    print("-" * 40)
+    
+    jobs = logo_jobs("outlines" if args.vector else "text")
+    encoding = partial(png_encode.encode_hash, optimize=args.optimize, webp=args.webp)
+    messages, skipped = asset_build.build(
+        create_logo_set, jobs, logos_dir, logo_hash,
+        workers=args.workers, force=args.force, job_outputs=logo_outputs, cache=cache,
+        manifest_hash=encoding,
+    )
+    if args.vector:
+        masters = master_jobs(args.pdf)
+        master_messages, master_skipped = asset_build.build(
+            create_logo_masters, masters, logos_dir, logo_hash,
+            workers=1, force=args.force, job_outputs=logo_outputs, cache=cache,
+        )
+        messages += master_messages
+        skipped += master_skipped
+    for message in chain.from_iterable(messages):
+        print(message)
+    if skipped:
+        print(f"Unchanged: {len(skipped)} logos skipped")
+    
+    if args.optimize or args.webp:
+        skipped = set(skipped)
+        written = [
+            os.path.join(logos_dir, filename)
+            for job in jobs for filename in logo_outputs(job) if filename not in skipped
+        ]
+        results = png_encode.optimize_files(written, args.workers, args.webp, optimize=args.optimize)
+        if args.optimize:
+            png_encode.print_report(results)
+    
+    print("-" * 40)
+    print(f"Done! {sum(len(logo_outputs(job)) for job in jobs)} PNG files saved to: {logos_dir}")
+    if args.vector:
+        print(f"Vector masters: {', '.join(filename for job in masters for filename in logo_outputs(job))}")
+    if cache is not None:
+        print(cache.finish("logos"))
+    render_trace.finish_from_args(args)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Generate responsive variants of the hero and project photos in public/.
+Emits width-stepped AVIF/WebP/JPEG files plus a JSON manifest of srcset
+entries for the Next.js app. Unchanged photos are skipped.
+"""
+
+import argparse
+import glob
+import json
+import os
+from PIL import Image, features
+
+import asset_build
+import build_manifest
+import resample
+
+# Public folder of the Next.js app
+public_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public")
+
+# Photos to process, relative to the public folder
+sources = [
+    "electrical-hero.png",
+    "bathroom-hero.jpg",
+    "images/*.webp",
+]
+
+# Variants go here, with manifest.json alongside
+output_subdir = "images/responsive"
+
+# Target widths; anything wider than the original is dropped
+widths = [480, 768, 1080, 1440, 1920, 2560]
+
+# Encoder settings per format
+formats = {
+    "avif": {"quality": 50, "speed": 6},
+    "webp": {"quality": 78, "method": 6},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+}
+
+# Pillow format names and file extensions
+format_names = {"avif": "AVIF", "webp": "WEBP", "jpeg": "JPEG"}
+extensions = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+
+def available_formats():
+    """Formats this Pillow build can encode; AVIF needs libavif."""
+    return [fmt for fmt in formats if fmt == "jpeg" or features.check(fmt)]
+
+def plan_variants(relpath, output_formats):
+    """Work out a photo's variant widths and output filenames from its header alone."""
+    with Image.open(os.path.join(public_dir, relpath)) as img:
+        width, height = img.size
+    steps = [w for w in widths if w < width] + [width]
+    stem = os.path.splitext(os.path.basename(relpath))[0]
+    outputs = tuple(
+        (w, round(height * w / width), fmt, f"{stem}-{w}.{extensions[fmt]}")
+        for w in steps for fmt in output_formats
+    )
+    return {"src": "/" + relpath.replace(os.sep, "/"), "width": width, "height": height, "outputs": outputs}
+
+def create_variants(relpath, output_dir, outputs):
+    """Decode a photo once and write every (width, height, format, filename) variant."""
+    with Image.open(os.path.join(public_dir, relpath)) as img:
+        # Photos are opaque; JPEG can't carry alpha anyway
+        img = img.convert("RGB")
+    sizes = sorted({(w, h) for w, h, _, _ in outputs}, reverse=True)
+    images = resample.derive_sizes(img, sizes)
+    for w, h, fmt, filename in outputs:
+        images[(w, h)].save(os.path.join(output_dir, filename), format_names[fmt], **formats[fmt])
+    return f"Created: {len(outputs)} variants of {relpath}"
+
+def srcset_entry(plan, url_prefix):
+    """Manifest entry for one photo: a srcset string per format plus a fallback src."""
+    entry = {"width": plan["width"], "height": plan["height"], "srcset": {}}
+    for w, _, fmt, filename in plan["outputs"]:
+        candidates = entry["srcset"].setdefault(fmt, [])
+        candidates.append(f"{url_prefix}/{filename} {w}w")
+    entry["srcset"] = {fmt: ", ".join(candidates) for fmt, candidates in entry["srcset"].items()}
+    fallback = [o for o in plan["outputs"] if o[2] == "jpeg"] or list(plan["outputs"])
+    entry["src"] = f"{url_prefix}/{fallback[-1][3]}"
+    return entry
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate responsive photo variants and a srcset manifest.")
+    asset_build.add_workers_argument(parser)
+    build_manifest.add_force_argument(parser)
+    args = parser.parse_args()
+
+    output_dir = os.path.join(public_dir, output_subdir)
+    os.makedirs(output_dir, exist_ok=True)
+    url_prefix = "/" + output_subdir
+    output_formats = available_formats()
+
+    print("Generating responsive images...")
+    print(f"Formats: {', '.join(output_formats)}")
+    print("-" * 40)
+
+    relpaths = []
+    for pattern in sources:
+        matches = glob.glob(os.path.join(public_dir, pattern))
+        relpaths.extend(sorted(os.path.relpath(path, public_dir) for path in matches))
+    plans = {relpath: plan_variants(relpath, output_formats) for relpath in relpaths}
+
+    def photo_hash(job):
+        relpath, _, outputs = job
+        source_digest = build_manifest.file_digest(os.path.join(public_dir, relpath))
+        return build_manifest.input_hash("responsive", source_digest, outputs, formats)
+
+    jobs = [(relpath, output_dir, plan["outputs"]) for relpath, plan in plans.items()]
+    messages, skipped = asset_build.build(
+        create_variants, jobs, output_dir, photo_hash,
+        workers=args.workers, force=args.force,
+        job_outputs=lambda job: [output[-1] for output in job[-1]],
+    )
+    for message in messages:
+        print(message)
+    if skipped:
+        print(f"Unchanged: {len(skipped)} variants skipped")
+
+    # srcset manifest keyed by the original public URL
+    srcsets = {plan["src"]: srcset_entry(plan, url_prefix) for plan in plans.values()}
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump(srcsets, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    print("-" * 40)
+    print(f"Done! {len(plans)} photos, srcset manifest at {manifest_path}")
+
+if __name__ == "__main__":
+    main()
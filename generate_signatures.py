@@ -4,8 +4,26 @@ Generate email signature PNGs for House of Clarence team members.
 High-quality 3x resolution for crisp output.
 """
 
+import argparse
+import asyncio
+from itertools import chain
 import os
-from playwright.sync_api import sync_playwright
+import sys
+
+import asset_build
+import build_manifest
+import bundle
+import html_template
+import png_encode
+import render_cache
+import render_ready
+import render_trace
+import resample
+import roster
+
+# Render settings (3x device scale factor for crisp output)
+viewport = {"width": 700, "height": 500}
+device_scale_factor = 3
 
 # Team members data
 team_members = [
@@ -22,270 +40,447 @@ team_members = [
     {"name": "Mehwish Qayoon", "role": "Operations Manager", "personal": "07424 224 107", "business": "0203 715 5892", "email": "mehwish"},
 ]
 
+# Company text shared by every signature; filled into the template and drawn
+# by the Pillow backend, so the two never drift apart
+signature_text = {
+    "company": "House of Clarence",
+    "tagline": "Refined Finishing for Discerning Spaces",
+    "domain": "houseofclarence.uk",
+    "address": "25-27 Clarence Street, Staines-upon-Thames, Surrey, TW18 4SY",
+    "notice_heading": "PRIVILEGED AND CONFIDENTIAL:",
+    "notice": (
+        "This email and any attachments are confidential and intended solely for the addressee. "
+        "If you are not the intended recipient, please notify us immediately and delete this message. "
+        "Unauthorized disclosure, copying or distribution is strictly prohibited. House of Clarence Ltd."
+    ),
+}
+
+# Signature document; compiled once and recompiled when the file changes
+signature_template = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "signature.html")
+
 def generate_signature_html(member):
-    """Generate HTML for a single signature."""
-    phone_html = ""
-    if member["personal"]:
-        phone_html = f'''
-        <div class="contact-row">
-          <svg viewBox="0 0 14 14"><path d="M8.5 2.5c2.5 0 3.5 1 3.5 3.5m-2-2.5c1 0 1.5.5 1.5 1.5M3.5 6c.8 1.8 2.7 3.7 4.5 4.5l1.5-1.5c.3-.3.8-.4 1.2-.2l2 .9c.5.2.8.7.8 1.2v1.6c0 .5-.5 1-1 1C5.5 13 1 8.5 1 3c0-.5.5-1 1-1h1.6c.5 0 1 .3 1.2.8l.9 2c.2.4.1.9-.2 1.2L4 7.5"/></svg>
-          <span class="phone-label">Personal:</span> {member["personal"]} <span class="phone-sep">|</span> <span class="phone-label">Business:</span> {member["business"]}
-        </div>'''
-    else:
-        phone_html = f'''
-        <div class="contact-row">
-          <svg viewBox="0 0 14 14"><path d="M8.5 2.5c2.5 0 3.5 1 3.5 3.5m-2-2.5c1 0 1.5.5 1.5 1.5M3.5 6c.8 1.8 2.7 3.7 4.5 4.5l1.5-1.5c.3-.3.8-.4 1.2-.2l2 .9c.5.2.8.7.8 1.2v1.6c0 .5-.5 1-1 1C5.5 13 1 8.5 1 3c0-.5.5-1 1-1h1.6c.5 0 1 .3 1.2.8l.9 2c.2.4.1.9-.2 1.2L4 7.5"/></svg>
-          {member["business"]}
-        </div>'''
+    """Generate HTML for a single signature; member fields are HTML-escaped."""
+    return html_template.load(signature_template).render({**signature_text, "members": [member]})
+
+def generate_sheet_html(members):
+    """Generate one document holding every member's .sig block, sharing one stylesheet."""
+    # Space the blocks apart so each clip contains exactly one signature
+    return html_template.load(signature_template).render(
+        {**signature_text, "members": members, "extra_css": "    .sig { margin-bottom: 24px; }\n"}
+    )
+
+def signature_filename(member):
+    """Create filename from name; anything but letters, digits, '-', '.' and "'" becomes '_'."""
+    name = "".join(ch if ch.isalnum() or ch in "-.'" else "_" for ch in member["name"])
+    # Never a hidden file or a parent-directory reference
+    return (name.lstrip(".") or "_") + ".png"
+
+def signature_hash(member, html_content, backend="chromium"):
+    """Hash of everything a signature PNG is rendered from."""
+    if backend == "pillow":
+        import pillow_renderer
+        return build_manifest.input_hash(
+            "signature-pillow", member, signature_text, device_scale_factor, pillow_renderer.fingerprint(),
+        )
+    return build_manifest.input_hash("signature", html_content, member, device_scale_factor, viewport)
+
+# Page-relative bounding box of every .sig block, in document order
+SIG_BOXES_SCRIPT = """els => els.map(el => {
+  const r = el.getBoundingClientRect();
+  return {x: r.x + window.scrollX, y: r.y + window.scrollY, width: r.width, height: r.height};
+})"""
+
+async def open_pages(browser, concurrency=4):
+    """Create the 3x context and its pool of reusable pages on a running browser."""
+    # Use 3x device scale factor for high-DPI/retina quality
+    with render_trace.span("context.new"):
+        context = await browser.new_context(
+            viewport=viewport,
+            device_scale_factor=device_scale_factor
+        )
+    with render_trace.span("page.new", count=concurrency):
+        pages = [await context.new_page() for _ in range(max(1, concurrency))]
+    return context, pages
+
+async def render_on_pages(pages, jobs, output_dir, on_done=None, timings=None, sheet_size=0):
+    """Render (member, html, filename, digest) jobs on already-open pages.
     
-    return f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <style>
-    * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-    body {{ 
-      font-family: -apple-system, BlinkMacSystemFont, 'Helvetica Neue', 'Segoe UI', sans-serif; 
-      background: transparent;
-      padding: 0;
-      -webkit-font-smoothing: antialiased;
-      -moz-osx-font-smoothing: grayscale;
-    }}
-    .sig {{
-      width: 650px;
-      background: #fff;
-    }}
-    .top-stripe {{
-      height: 5px;
-      background: #0a0a0a;
-    }}
-    .main {{
-      padding: 20px 25px;
-      background: #f8f7f5;
-    }}
-    .header {{
-      display: flex;
-      justify-content: space-between;
-      align-items: flex-start;
-      margin-bottom: 15px;
-      padding-bottom: 15px;
-      border-bottom: 2px solid #0a0a0a;
-    }}
-    /* Left side: HOC | Person */
-    .left-brand {{
-      display: flex;
-      align-items: center;
-      gap: 15px;
-    }}
-    .hoc {{
-      font-weight: 200;
-      font-size: 28px;
-      letter-spacing: 0.06em;
-      color: #0a0a0a;
-    }}
-    .divider {{
-      width: 2px;
-      height: 35px;
-      background: #2d2d2d;
-    }}
-    .person {{
-      text-align: left;
-    }}
-    .person-name {{
-      font-size: 14px;
-      font-weight: 500;
-      color: #0a0a0a;
-      margin-bottom: 2px;
-    }}
-    .person-role {{
-      font-size: 10px;
-      color: #888;
-      font-weight: 400;
-    }}
-    /* Right side: House of Clarence */
-    .brand-text {{
-      text-align: right;
-    }}
-    .company {{
-      font-size: 10px;
-      letter-spacing: 0.12em;
-      text-transform: uppercase;
-      color: #0a0a0a;
-      font-weight: 400;
-    }}
-    .tagline {{
-      font-size: 9px;
-      color: #888;
-      margin-top: 3px;
-      font-weight: 300;
-    }}
-    .body {{
-      display: flex;
-      justify-content: space-between;
-      align-items: flex-end;
-    }}
-    .contacts {{
-      display: flex;
-      flex-direction: column;
-      gap: 6px;
-    }}
-    .contact-row {{
-      display: flex;
-      align-items: center;
-      font-size: 11px;
-      color: #333;
-    }}
-    .contact-row svg {{
-      width: 14px;
-      height: 14px;
-      margin-right: 10px;
-      fill: none;
-      stroke: #888;
-      stroke-width: 1.5;
-      flex-shrink: 0;
-    }}
-    .phone-label {{
-      color: #888;
-      font-size: 9px;
-      margin-right: 3px;
-    }}
-    .phone-sep {{
-      color: #ccc;
-      margin: 0 8px;
-    }}
-    .socials {{
-      display: flex;
-      gap: 6px;
-    }}
-    .social-icon {{
-      width: 28px;
-      height: 28px;
-      display: inline-flex;
-      align-items: center;
-      justify-content: center;
-      background: #0a0a0a;
-      color: #fff;
-      border-radius: 50%;
-      font-size: 11px;
-      text-decoration: none;
-      font-weight: 400;
-    }}
-    .bottom-stripe {{
-      height: 4px;
-      background: #8a8a8a;
-    }}
-    .notice {{
-      font-size: 9px;
-      color: #999;
-      line-height: 1.6;
-      padding: 12px 25px;
-      background: #fafafa;
-      border-top: 1px solid #eee;
-    }}
-    .notice strong {{
-      color: #666;
-    }}
-  </style>
-</head>
-<body>
-<div class="sig">
-  <div class="top-stripe"></div>
-  <div class="main">
-    <div class="header">
-      <!-- Left: HOC | Person Name & Title -->
-      <div class="left-brand">
-        <div class="hoc">HOC</div>
-        <div class="divider"></div>
-        <div class="person">
-          <div class="person-name">{member["name"]}</div>
-          <div class="person-role">{member["role"]}</div>
-        </div>
-      </div>
-      <!-- Right: House of Clarence text -->
-      <div class="brand-text">
-        <div class="company">House of Clarence</div>
-        <div class="tagline">Refined Finishing for Discerning Spaces</div>
-      </div>
-    </div>
-    <div class="body">
-      <div class="contacts">
-        <div class="contact-row">
-          <svg viewBox="0 0 14 14"><path d="M2 4l5 3.5L12 4"/><rect x="1.5" y="3" width="11" height="8" rx="1"/></svg>
-          {member["email"]}@houseofclarence.uk
-        </div>
-        {phone_html}
-        <div class="contact-row">
-          <svg viewBox="0 0 14 14"><circle cx="7" cy="7" r="5"/><path d="M7 4v3l2 1"/></svg>
-          houseofclarence.uk
-        </div>
-        <div class="contact-row">
-          <svg viewBox="0 0 14 14"><path d="M7 1.5c-2.5 0-4 2-4 4 0 3 4 7 4 7s4-4 4-7c0-2-1.5-4-4-4z"/><circle cx="7" cy="5.5" r="1.5"/></svg>
-          25-27 Clarence Street, Staines-upon-Thames, Surrey, TW18 4SY
-        </div>
-      </div>
-      <div class="socials">
-        <a class="social-icon">in</a>
-        <a class="social-icon">f</a>
-        <a class="social-icon">X</a>
-        <a class="social-icon">◎</a>
-      </div>
-    </div>
-  </div>
-  <div class="bottom-stripe"></div>
-  <div class="notice">
-    <strong>PRIVILEGED AND CONFIDENTIAL:</strong> This email and any attachments are confidential and intended solely for the addressee. If you are not the intended recipient, please notify us immediately and delete this message. Unauthorized disclosure, copying or distribution is strictly prohibited. House of Clarence Ltd.
-  </div>
-</div>
-</body>
-</html>'''
+    Each page is owned by one worker task; the job queue is bounded so a slow
+    browser holds back the producer instead of buffering the whole roster.
+    With sheet_size, that many members share one document and one layout pass,
+    and each PNG is clipped from the page at its .sig bounding box.
+    on_done(filename, digest, error) is called as each job finishes; render-ready
+    waits are recorded into timings when given. With output_dir None nothing is
+    written and on_done(filename, digest, None, png_bytes) gets the capture instead.
+    If on_done raises for a finished job, it is called again with that exception
+    as the job's error, so callbacks need no guard of their own; the error call
+    itself must not raise.
+    """
+    queue = asyncio.Queue(maxsize=len(pages) * 2)
+    
+    def report(filename, digest, error, *data):
+        if not on_done:
+            return
+        try:
+            on_done(filename, digest, error, *data)
+        except Exception as exc:
+            if error is not None:
+                raise
+            on_done(filename, digest, exc)
+    
+    def finished(filename, digest, data):
+        if output_dir is None:
+            report(filename, digest, None, data)
+        else:
+            report(filename, digest, None)
+    
+    async def render_one(page, job, done):
+        member, html_content, filename, digest = job
+        with render_trace.span("page.set_content", file=filename):
+            await page.set_content(html_content, wait_until="domcontentloaded")
+        
+        # Wait until fonts are loaded and a frame is painted
+        with render_trace.span("page.render_ready", file=filename):
+            await render_ready.wait_until_ready_async(page, timings=timings)
+        
+        # Get the signature element and screenshot it at 3x scale
+        with render_trace.span("page.query_selector", file=filename):
+            sig_element = await page.query_selector(".sig")
+        filepath = os.path.join(output_dir, filename) if output_dir else None
+        # Chromium captures, PNG-encodes and writes in this one call
+        with render_trace.span("element.screenshot", file=filename):
+            data = await sig_element.screenshot(path=filepath, type="png", timeout=5000)
+        done.add(filename)
+        finished(filename, digest, data)
+    
+    async def render_sheet(page, batch, done):
+        sheet_html = generate_sheet_html([member for member, _, _, _ in batch])
+        with render_trace.span("page.set_content", members=len(batch)):
+            await page.set_content(sheet_html, wait_until="domcontentloaded")
+        with render_trace.span("page.render_ready", members=len(batch)):
+            await render_ready.wait_until_ready_async(page, timings=timings)
+        
+        # One layout pass for the whole sheet, then clip each signature out of it
+        with render_trace.span("page.query_selector", members=len(batch)):
+            boxes = await page.eval_on_selector_all(".sig", SIG_BOXES_SCRIPT)
+        for (member, _, filename, digest), box in zip(batch, boxes):
+            filepath = os.path.join(output_dir, filename) if output_dir else None
+            with render_trace.span("element.screenshot", file=filename):
+                data = await page.screenshot(path=filepath, type="png", clip=box, full_page=True, timeout=5000)
+            done.add(filename)
+            finished(filename, digest, data)
+    
+    async def worker(page):
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            done = set()
+            try:
+                if sheet_size:
+                    await render_sheet(page, batch, done)
+                else:
+                    await render_one(page, batch[0], done)
+            except Exception as exc:
+                # Report whatever in the batch did not make it
+                for _, _, filename, digest in batch:
+                    if filename not in done:
+                        report(filename, digest, exc)
+    
+    workers = [asyncio.create_task(worker(page)) for page in pages]
+    try:
+        for batch in asset_build.batched(jobs, sheet_size or 1):
+            await queue.put(batch)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+async def render_signatures(jobs, output_dir, concurrency=4, on_done=None, timings=None, sheet_size=0):
+    """Launch Chromium, render every job on a pool of concurrency pages, then close it."""
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        with render_trace.span("browser.launch"):
+            browser = await p.chromium.launch()
+        try:
+            _, pages = await open_pages(browser, concurrency)
+            await render_on_pages(pages, jobs, output_dir, on_done, timings, sheet_size)
+        finally:
+            await browser.close()
+
+def save_pillow_signature(member, filepath, encode_options):
+    """Draw one signature with Pillow and save it like a capture; a picklable JobQueue job."""
+    import pillow_renderer
+    data = pillow_renderer.signature_png(member, device_scale_factor)
+    return data, png_encode.save_capture(filepath, data, *encode_options)
+
+def encode_pillow_signature(member, filename, encode_options):
+    """Draw one signature with Pillow and encode it like a capture, in memory; a picklable JobQueue job."""
+    import pillow_renderer
+    data = pillow_renderer.signature_png(member, device_scale_factor)
+    return data, png_encode.encode_capture(filename, data, *encode_options)
+
+def export_bundle(archive, members, args, counts, cache=None):
+    """Render every member straight into archive, with variants and optimized encodings.
+
+    Nothing is written to disk and no manifest is kept: a bundle always holds the whole roster.
+    Variants and encodings are made on a JobQueue; the archive is written as results come back.
+    """
+    encode_options = (device_scale_factor, args.densities, args.widths, args.optimize, args.webp)
+    # Sequence number -> (member, filename, cache key, cached) for every job not yet in the archive;
+    # the number rides in the render job's digest slot, so equal filenames never collide
+    pending = {}
+    
+    def added(seq, result, error):
+        member, filename, key, cached = pending.pop(seq)
+        if error is None and args.backend == "pillow" and not cached:
+            data, result = result
+            if key:
+                cache.write(key, data)
+        if error is not None:
+            counts["failed"] += 1
+            print(f"✗ Failed: {filename} ({error})")
+            return
+        for name, png, webp in result:
+            details = {"member": member} if name == filename else {"variant_of": filename}
+            archive.add(name, png, **details)
+            if webp:
+                archive.add(os.path.splitext(name)[0] + ".webp", webp, variant_of=filename)
+        counts["cached" if cached else "created"] += 1
+        status = "Cached" if cached else "Bundled"
+        print(f"✓ {status}: {filename}" + (f" (+{len(result) - 1} variants)" if len(result) > 1 else ""))
+    
+    def encode(seq, filename, data):
+        encoder.submit(seq, png_encode.encode_capture, filename, data, *encode_options)
+        for outcome in encoder.ready():
+            added(*outcome)
+    
+    def jobs():
+        for seq, member in enumerate(members):
+            html_content = generate_signature_html(member)
+            filename = signature_filename(member)
+            key = None
+            if cache is not None:
+                key = cache.key(signature_hash(member, html_content, args.backend), filename)
+                data = cache.read(key)
+                if data is not None:
+                    pending[seq] = (member, filename, None, True)
+                    encode(seq, filename, data)
+                    continue
+            pending[seq] = (member, filename, key, False)
+            yield (member, html_content, filename, seq)
+    
+    def report(_, seq, error, data=None):
+        if error is not None:
+            added(seq, None, error)
+            return
+        _, filename, key, _ = pending[seq]
+        if key:
+            cache.write(key, data)
+        encode(seq, filename, data)
+    
+    with asset_build.JobQueue(args.workers) as encoder:
+        if args.backend == "pillow":
+            # Workers draw and encode in one job; cache hits are only encoded
+            for member, _, filename, seq in jobs():
+                encoder.submit(seq, encode_pillow_signature, member, filename, encode_options)
+                for outcome in encoder.ready():
+                    added(*outcome)
+        else:
+            all_jobs = jobs()
+            first = next(all_jobs, None)
+            if first is not None:
+                timings = render_ready.ReadyTimings()
+                # The browser moves on while the pool encodes its captures
+                asyncio.run(render_signatures(
+                    chain([first], all_jobs), None, args.concurrency, report, timings,
+                    sheet_size=args.sheet_size,
+                ))
+                print(timings.summary())
+        for outcome in encoder.drain():
+            added(*outcome)
 
 def main():
-    # Create output directory
-    output_dir = "/Users/mateodervishi/Desktop/Email Signatures"
-    os.makedirs(output_dir, exist_ok=True)
+    parser = argparse.ArgumentParser(description="Generate House of Clarence email signature PNGs.")
+    build_manifest.add_force_argument(parser)
+    parser.add_argument(
+        "--concurrency", type=int, default=min(4, os.cpu_count() or 1),
+        help="number of browser pages rendering in parallel",
+    )
+    parser.add_argument(
+        "--sheet-size", type=int, default=0,
+        help="lay out this many members in one document and clip each PNG from it "
+             "(default: one document per member)",
+    )
+    parser.add_argument(
+        "--backend", choices=["chromium", "pillow"], default="chromium",
+        help="render through headless Chromium or draw directly with Pillow",
+    )
+    asset_build.add_workers_argument(parser)
+    roster.add_roster_arguments(parser)
+    resample.add_variant_arguments(parser)
+    png_encode.add_encode_arguments(parser)
+    render_cache.add_cache_arguments(parser)
+    bundle.add_bundle_arguments(parser)
+    render_trace.add_trace_argument(parser)
+    parser.add_argument(
+        "--output-dir", default="/Users/mateodervishi/Desktop/Email Signatures",
+        help="where to write the PNGs",
+    )
+    args = parser.parse_args()
+    render_trace.start_from_args(args)
+    environment = render_cache.pillow_fingerprint() if args.backend == "pillow" else render_cache.browser_fingerprint()
+    cache = render_cache.from_args(args, environment)
     
-    print(f"Generating {len(team_members)} email signatures at 3x resolution...")
-    print(f"Output directory: {output_dir}")
-    print()
+    archive = None
+    stdout = sys.stdout
+    if args.bundle:
+        archive = bundle.Bundle(args.bundle, args.bundle_format)
+        if args.bundle == "-":
+            # The archive owns stdout; progress goes to stderr
+            sys.stdout = sys.stderr
+        output_dir = args.bundle
+    else:
+        # Create output directory
+        output_dir = args.output_dir
+        os.makedirs(output_dir, exist_ok=True)
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        # Use 3x device scale factor for high-DPI/retina quality
-        context = browser.new_context(
-            viewport={"width": 700, "height": 500},
-            device_scale_factor=3
-        )
+    if args.roster:
+        def report_bad_row(line_no, message):
+            counts["invalid"] += 1
+            print(f"✗ Skipped roster line {line_no}: {message}")
         
-        for member in team_members:
-            # Generate HTML
+        members = roster.iter_members(args.roster, args.roster_format, report_bad_row, key=signature_filename)
+        print(f"Generating email signatures from {args.roster} at 3x resolution...")
+    else:
+        members = iter(team_members)
+        print(f"Generating {len(team_members)} email signatures at 3x resolution...")
+    print(f"{'Bundle' if archive else 'Output directory'}: {output_dir}")
+    print()
+    
+    counts = {"created": 0, "cached": 0, "skipped": 0, "failed": 0, "invalid": 0}
+    if archive is not None:
+        try:
+            try:
+                export_bundle(archive, members, args, counts, cache)
+                archive.close("House of Clarence email signatures")
+            except BaseException:
+                archive.abort()
+                raise
+            if counts["failed"] or counts["invalid"]:
+                print(f"Problems: {counts['failed']} failed renders, {counts['invalid']} malformed roster rows")
+            print(f"{counts['created'] + counts['cached']} signatures bundled into: {output_dir}")
+            if cache is not None:
+                print(cache.finish("signatures"))
+            render_trace.finish_from_args(args)
+        finally:
+            sys.stdout = stdout
+        return
+    
+    encoded = []
+    manifest = build_manifest.Manifest(output_dir)
+    # Render cache key of every signature sent to the renderer
+    cache_keys = {}
+    # Variants, optimized encoding and disk writes happen off the render loop
+    encode_options = (device_scale_factor, args.densities, args.widths, args.optimize, args.webp)
+    
+    def pending_jobs():
+        # Only render members whose HTML, record or render settings changed
+        for member in members:
             html_content = generate_signature_html(member)
-            
-            # Create page and set content
-            page = context.new_page()
-            page.set_content(html_content, wait_until="domcontentloaded")
-            
-            # Brief wait for rendering
-            page.wait_for_timeout(100)
-            
-            # Get the signature element and screenshot it
-            sig_element = page.query_selector(".sig")
-            
-            # Create filename from name
-            filename = member["name"].replace(" ", "_") + ".png"
-            filepath = os.path.join(output_dir, filename)
-            
-            # Screenshot at 3x scale
-            sig_element.screenshot(path=filepath, type="png", timeout=5000)
-            
-            print(f"✓ Created: {filename}")
-            
-            page.close()
-        
-        browser.close()
+            filename = signature_filename(member)
+            base_digest = signature_hash(member, html_content, args.backend)
+            digest = png_encode.encode_hash(
+                resample.variant_hash(base_digest, args.densities, args.widths), args.optimize, args.webp,
+            )
+            if not args.force and manifest.is_current(filename, digest):
+                counts["skipped"] += 1
+                continue
+            if cache is not None:
+                # The 3x master is cached; variants are cheap to derive again
+                key = cache.key(base_digest, filename)
+                data = cache.read(key)
+                if data is not None:
+                    captured(filename, digest, data, cached=True)
+                    continue
+                cache_keys[filename] = key
+            yield (member, html_content, filename, digest)
+    
+    def failed(filename, error):
+        counts["failed"] += 1
+        print(f"✗ Failed: {filename} ({error})")
+    
+    def saved(tag, result, error):
+        filename, digest, cached = tag
+        if error is not None:
+            # Not recorded, so the next run tries it again
+            cache_keys.pop(filename, None)
+            failed(filename, error)
+            return
+        if args.backend == "pillow" and not cached:
+            data, result = result
+            if filename in cache_keys:
+                cache.write(cache_keys.pop(filename), data)
+        variants, results = result
+        encoded.extend(results)
+        counts["cached" if cached else "created"] += 1
+        manifest.record(filename, digest)
+        status = "Cached" if cached else "Created"
+        print(f"✓ {status}: {filename}" + (f" (+{len(variants)} variants)" if variants else ""))
+    
+    def captured(filename, digest, data, cached=False):
+        if filename in cache_keys:
+            cache.write(cache_keys.pop(filename), data)
+        filepath = os.path.join(output_dir, filename)
+        encoder.submit((filename, digest, cached), png_encode.save_capture, filepath, data, *encode_options)
+        for outcome in encoder.ready():
+            saved(*outcome)
+    
+    def report(filename, digest, error, data=None):
+        if error is None:
+            captured(filename, digest, data)
+        else:
+            failed(filename, error)
+    
+    with asset_build.JobQueue(args.workers) as encoder:
+        if args.backend == "pillow":
+            # Workers draw and save; cache hits still go through captured()
+            for member, _, filename, digest in pending_jobs():
+                filepath = os.path.join(output_dir, filename)
+                encoder.submit((filename, digest, False), save_pillow_signature, member, filepath, encode_options)
+                for outcome in encoder.ready():
+                    saved(*outcome)
+        else:
+            # Peek so an all-unchanged run never launches the browser
+            jobs = pending_jobs()
+            first = next(jobs, None)
+            if first is not None:
+                timings = render_ready.ReadyTimings()
+                # Captures come back as PNG bytes; the browser moves on while the pool saves them
+                asyncio.run(render_signatures(
+                    chain([first], jobs), None, args.concurrency, report, timings,
+                    sheet_size=args.sheet_size,
+                ))
+                print(timings.summary())
+        for outcome in encoder.drain():
+            saved(*outcome)
+    manifest.save()
+    
+    png_encode.print_report(encoded)
+    
+    if counts["skipped"]:
+        print(f"Unchanged: {counts['skipped']} signatures skipped")
+    if cache is not None:
+        print(cache.finish("signatures"))
+    if counts["failed"] or counts["invalid"]:
+        print(f"Problems: {counts['failed']} failed renders, {counts['invalid']} malformed roster rows")
     
     print()
-    print(f"All {len(team_members)} signatures saved to: {output_dir}")
+    print(f"{counts['created'] + counts['cached'] + counts['skipped']} signatures saved to: {output_dir}")
     print("Resolution: 3x (high-quality retina)")
+    render_trace.finish_from_args(args)
 
 if __name__ == "__main__":
     main()
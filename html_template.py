@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Precompiled HTML templates.
+A small Mustache subset: a template file is parsed once into static chunks
+and slots, cached, and re-parsed only when the file's mtime changes.
+Rendering joins the shared static chunks with the slot values, so a roster
+of thousands costs one parse plus a join per member.
+
+    {{field}}              HTML-escaped value (None renders as nothing)
+    {{{field}}}            value inserted as is
+    {{#field}}...{{/field}} repeated per item of a list (each item's fields in
+                           scope), else kept once when the field is truthy
+    {{^field}}...{{/field}} kept only when the field is falsy or an empty list
+    {{! comment }}         dropped at compile time
+"""
+
+from html import escape
+import os
+import re
+
+TAG = re.compile(r"\{\{\{\s*(\w+)\s*\}\}\}|\{\{(!.*?|[#^/]?\s*\w+\s*)\}\}", re.DOTALL)
+
+# path -> (mtime_ns, Template)
+_compiled = {}
+
+class TemplateError(ValueError):
+    pass
+
+class Template:
+    """A compiled template: nodes are static strings, ("var"/"raw", name) or (kind, name, children)."""
+
+    def __init__(self, source, name="<template>"):
+        self.name = name
+        self.nodes = self._compile(source)
+
+    def _compile(self, source):
+        root = []
+        stack = [(None, root)]
+        pos = 0
+        for match in TAG.finditer(source):
+            if match.start() > pos:
+                stack[-1][1].append(source[pos:match.start()])
+            pos = match.end()
+            raw, tag = match.groups()
+            if raw:
+                stack[-1][1].append(("raw", raw))
+                continue
+            tag = tag.strip()
+            if tag.startswith("!"):
+                continue
+            kind, field = (tag[0], tag[1:].strip()) if tag[0] in "#^/" else ("", tag)
+            if kind in ("#", "^"):
+                children = []
+                stack[-1][1].append((kind, field, children))
+                stack.append((field, children))
+            elif kind == "/":
+                if stack[-1][0] != field:
+                    line = source.count("\n", 0, match.start()) + 1
+                    raise TemplateError(f"{self.name}:{line}: {{{{/{field}}}}} closes {stack[-1][0] or 'nothing'}")
+                stack.pop()
+            else:
+                stack[-1][1].append(("var", field))
+        if len(stack) > 1:
+            raise TemplateError(f"{self.name}: section {stack[-1][0]} is never closed")
+        if pos < len(source):
+            root.append(source[pos:])
+        return root
+
+    def render(self, context):
+        out = []
+        _render(self.nodes, (context,), out.append)
+        return "".join(out)
+
+def _lookup(scopes, field):
+    for scope in reversed(scopes):
+        if field in scope:
+            return scope[field]
+    return None
+
+def _render(nodes, scopes, append):
+    for node in nodes:
+        if node.__class__ is str:
+            append(node)
+            continue
+        kind, field = node[0], node[1]
+        value = _lookup(scopes, field)
+        if kind == "var":
+            if value is not None:
+                append(escape(str(value)))
+        elif kind == "raw":
+            if value is not None:
+                append(str(value))
+        elif kind == "#":
+            if isinstance(value, (list, tuple)):
+                for item in value:
+                    _render(node[2], scopes + (item,), append)
+            elif value:
+                _render(node[2], scopes, append)
+        elif not value:
+            _render(node[2], scopes, append)
+
+def load(path):
+    """The compiled template at path, recompiled only after the file changes."""
+    # One stat per call, so an edit is picked up by the very next render
+    mtime = os.stat(path).st_mtime_ns
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, encoding="utf-8") as f:
+        template = Template(f.read(), os.path.basename(path))
+    _compiled[path] = (mtime, template)
+    return template
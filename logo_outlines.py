@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Vector HOC logos from glyph outlines.
+Outlines are read once per font with fontTools (an optional dependency) and
+spaced with generate_logos.space_letters, so the SVG/PDF masters and any PNG
+rasterized from them line up with the text-rendered logos.
+The outlines are unhinted while Pillow's text is hinted, so rasterized PNGs
+are not pixel-identical to the text path: letters land within a pixel, but
+stem and bar edges can move by one, which changes 1-3% of the pixels and
+some of those by a full alpha step (measured with visual_regression.py).
+"""
+
+from functools import lru_cache
+from fontTools.pens.basePen import BasePen
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.ttLib import TTFont
+from PIL import Image, ImageDraw
+
+import generate_logos
+
+# Line segments per cubic when flattening for rasterization
+CURVE_STEPS = 16
+
+class _ContourPen(BasePen):
+    """Record contours as ("M"/"L"/"C", points) ops; quadratic curves arrive as cubics."""
+
+    def __init__(self, glyph_set):
+        super().__init__(glyph_set)
+        self.ops = []
+
+    def _moveTo(self, pt):
+        self.ops.append(("M", (pt,)))
+
+    def _lineTo(self, pt):
+        self.ops.append(("L", (pt,)))
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        self.ops.append(("C", (pt1, pt2, pt3)))
+
+    def _closePath(self):
+        self.ops.append(("Z", ()))
+
+    _endPath = _closePath
+
+@lru_cache(maxsize=8)
+def glyph_outlines(font_path, text):
+    """(units per em, ascender, [(ops, (xMin, yMin, xMax, yMax), advance), ...]) per letter, in font units."""
+    font = TTFont(font_path, fontNumber=0, lazy=True)
+    cmap = font.getBestCmap()
+    glyph_set = font.getGlyphSet()
+    glyphs = []
+    for letter in text:
+        glyph = glyph_set[cmap.get(ord(letter), ".notdef")]
+        pen = _ContourPen(glyph_set)
+        glyph.draw(pen)
+        bounds = BoundsPen(glyph_set)
+        glyph.draw(bounds)
+        glyphs.append((tuple(pen.ops), bounds.bounds or (0, 0, 0, 0), glyph.width))
+    return font["head"].unitsPerEm, font["hhea"].ascent, tuple(glyphs)
+
+@lru_cache(maxsize=32)
+def placed_outlines(font_path, text, font_size, canvas_width, canvas_height):
+    """Every letter's ops in canvas units (y down), positioned like logo_layout."""
+    units_per_em, ascent, glyphs = glyph_outlines(font_path, text)
+    s = font_size / units_per_em
+    # Boxes as Pillow's getbbox reports them: relative to the draw origin on the
+    # ascender line, spanning the advance width horizontally
+    bboxes = [
+        (min(0, b[0]) * s, (ascent - b[3]) * s, max(advance, b[2]) * s, (ascent - b[1]) * s)
+        for _, b, advance in glyphs
+    ]
+    origins = generate_logos.space_letters(bboxes, font_size * 0.15, canvas_width, canvas_height)
+    placed = []
+    for (ops, _, _), (x, y) in zip(glyphs, origins):
+        baseline = y + ascent * s
+        placed.append(tuple(
+            (op, tuple((x + px * s, baseline - py * s) for px, py in points)) for op, points in ops
+        ))
+    return tuple(placed)
+
+def _number(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+def _hex(color):
+    return "#{:02x}{:02x}{:02x}".format(*color[:3])
+
+def logo_svg(font_path, text, font_size, canvas_width, canvas_height, color):
+    """A standalone SVG of the logo drawn as filled outlines (no font needed to view it)."""
+    parts = []
+    for ops in placed_outlines(font_path, text, font_size, canvas_width, canvas_height):
+        for op, points in ops:
+            parts.append(op + " ".join(f"{_number(x)} {_number(y)}" for x, y in points))
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {canvas_width} {canvas_height}" '
+        f'width="{canvas_width}" height="{canvas_height}">\n'
+        f'  <path fill="{_hex(color)}" d="{"".join(parts)}"/>\n'
+        f'</svg>\n'
+    )
+
+def logo_pdf(font_path, text, font_size, canvas_width, canvas_height, color):
+    """A one-page PDF (page size in points = canvas pixels) with the logo as a filled path."""
+    ops_map = {"M": "m", "L": "l", "C": "c", "Z": "h"}
+    r, g, b = (channel / 255 for channel in color[:3])
+    lines = [f"{_number(r)} {_number(g)} {_number(b)} rg"]
+    for ops in placed_outlines(font_path, text, font_size, canvas_width, canvas_height):
+        for op, points in ops:
+            # PDF user space has y pointing up
+            coords = " ".join(f"{_number(x)} {_number(canvas_height - y)}" for x, y in points)
+            lines.append(f"{coords} {ops_map[op]}".strip())
+    lines.append("f")
+    content = "\n".join(lines).encode("ascii")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {canvas_width} {canvas_height}] /Contents 4 0 R >>".encode(),
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def _flatten(ops, scale):
+    """Split ops into closed polygons in pixel units."""
+    polygons = []
+    current = []
+    for op, points in ops:
+        if op == "M":
+            current = [points[0]]
+        elif op == "L":
+            current.append(points[0])
+        elif op == "C":
+            (x0, y0), (x1, y1), (x2, y2), (x3, y3) = current[-1], *points
+            for step in range(1, CURVE_STEPS + 1):
+                t = step / CURVE_STEPS
+                mt = 1 - t
+                current.append((
+                    mt ** 3 * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t ** 3 * x3,
+                    mt ** 3 * y0 + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t ** 3 * y3,
+                ))
+        elif op == "Z" and len(current) > 2:
+            polygons.append([(x * scale, y * scale) for x, y in current])
+            current = []
+    return polygons
+
+def _signed_area(polygon):
+    """Shoelace area; the sign gives the contour's direction."""
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1])) / 2
+
+def render_outline_mask(font_path, text, font_size, canvas_width, canvas_height, supersample=4):
+    """Rasterize the placed outlines to an "L" coverage mask of the canvas size.
+
+    Filled with the nonzero winding rule, like the SVG and PDF masters and the
+    font itself: counters wind against their outer contour, and overlapping
+    contours (common in variable fonts) stay filled.
+    """
+    import numpy as np
+    size = (canvas_width * supersample, canvas_height * supersample)
+    winding = np.zeros((size[1], size[0]), dtype=np.int16)
+    for ops in placed_outlines(font_path, text, font_size, canvas_width, canvas_height):
+        for polygon in _flatten(ops, supersample):
+            contour = Image.new("1", size, 0)
+            ImageDraw.Draw(contour).polygon(polygon, fill=1)
+            # A glyph contour doesn't cross itself, so it winds +-1 everywhere inside
+            inside = np.asarray(contour)
+            if _signed_area(polygon) > 0:
+                winding += inside
+            else:
+                winding -= inside
+    coverage = Image.fromarray(np.where(winding != 0, 255, 0).astype(np.uint8))
+    return coverage.reduce(supersample)
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Chromium-free Pillow backend for the signature and letterhead layouts.
+Reproduces the CSS in templates/signature.html and generate_letterhead.py
+with Pillow primitives, at the same 3x scale as the browser captures. The
+signature text comes from generate_signatures.signature_text, like the template's.
+"""
+
+import argparse
+import io
+import os
+import re
+from PIL import Image, ImageChops, ImageDraw
+
+import font_cache
+import render_trace
+
+# Bump when the drawing code changes so incremental builds re-render
+RENDERER_VERSION = "1"
+
+# Sans-serif faces by CSS weight, closest to the -apple-system stack first;
+# resolved through the font index
+font_paths = {
+    200: [
+        ("DejaVu Sans", 200),
+    ],
+    400: [
+        ("Helvetica", 400),
+        ("Arial", 400),
+        ("Liberation Sans", 400),
+        ("DejaVu Sans", 400),
+    ],
+    700: [
+        ("Arial", 700),
+        ("Liberation Sans", 700),
+        ("DejaVu Sans", 700),
+    ],
+}
+
+# 14x14 stroked icons from the signature template
+ICON_MAIL = [("path", "M2 4l5 3.5L12 4"), ("rect", 1.5, 3, 11, 8, 1)]
+ICON_PHONE = [("path", "M8.5 2.5c2.5 0 3.5 1 3.5 3.5m-2-2.5c1 0 1.5.5 1.5 1.5M3.5 6c.8 1.8 2.7 3.7 4.5 4.5l1.5-1.5c.3-.3.8-.4 1.2-.2l2 .9c.5.2.8.7.8 1.2v1.6c0 .5-.5 1-1 1C5.5 13 1 8.5 1 3c0-.5.5-1 1-1h1.6c.5 0 1 .3 1.2.8l.9 2c.2.4.1.9-.2 1.2L4 7.5")]
+ICON_WEB = [("circle", 7, 7, 5), ("path", "M7 4v3l2 1")]
+ICON_PIN = [("path", "M7 1.5c-2.5 0-4 2-4 4 0 3 4 7 4 7s4-4 4-7c0-2-1.5-4-4-4z"), ("circle", 7, 5.5, 1.5)]
+
+PATH_TOKEN = re.compile(r"[MmLlHhVvCcSsZz]|-?(?:\d+\.?\d*|\.\d+)")
+
+def weight_fonts(weight):
+    """Candidate font files for a CSS weight, falling back to the regular face."""
+    if weight <= 300:
+        return font_paths[200] + font_paths[400]
+    if weight >= 600:
+        return font_paths[700] + font_paths[400]
+    return font_paths[400]
+
+def flatten_path(d, steps=8):
+    """Flatten an SVG path (M/L/H/V/C/S/Z, absolute or relative) into polylines."""
+    tokens = PATH_TOKEN.findall(d)
+    polylines = []
+    points = []
+    x = y = start_x = start_y = 0.0
+    last_ctrl = None
+    command = None
+    i = 0
+
+    def number():
+        nonlocal i
+        value = float(tokens[i])
+        i += 1
+        return value
+
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+        relative = command.islower()
+        op = command.upper()
+        if op == "Z":
+            points.append((start_x, start_y))
+            x, y = start_x, start_y
+            polylines.append(points)
+            points = []
+            last_ctrl = None
+            continue
+        if op == "M":
+            dx, dy = number(), number()
+            x, y = (x + dx, y + dy) if relative else (dx, dy)
+            if len(points) > 1:
+                polylines.append(points)
+            points = [(x, y)]
+            start_x, start_y = x, y
+            # Further coordinate pairs after a moveto are linetos
+            command = "l" if relative else "L"
+            last_ctrl = None
+        elif op == "L":
+            dx, dy = number(), number()
+            x, y = (x + dx, y + dy) if relative else (dx, dy)
+            points.append((x, y))
+            last_ctrl = None
+        elif op == "H":
+            value = number()
+            x = x + value if relative else value
+            points.append((x, y))
+            last_ctrl = None
+        elif op == "V":
+            value = number()
+            y = y + value if relative else value
+            points.append((x, y))
+            last_ctrl = None
+        elif op in "CS":
+            if op == "C":
+                x1, y1 = number(), number()
+                if relative:
+                    x1, y1 = x + x1, y + y1
+            else:
+                # Smooth curve: reflect the previous control point
+                x1, y1 = (2 * x - last_ctrl[0], 2 * y - last_ctrl[1]) if last_ctrl else (x, y)
+            x2, y2, x3, y3 = number(), number(), number(), number()
+            if relative:
+                x2, y2, x3, y3 = x + x2, y + y2, x + x3, y + y3
+            for step in range(1, steps + 1):
+                t = step / steps
+                mt = 1 - t
+                points.append((
+                    mt ** 3 * x + 3 * mt ** 2 * t * x1 + 3 * mt * t ** 2 * x2 + t ** 3 * x3,
+                    mt ** 3 * y + 3 * mt ** 2 * t * y1 + 3 * mt * t ** 2 * y2 + t ** 3 * y3,
+                ))
+            x, y = x3, y3
+            last_ctrl = (x2, y2)
+    if len(points) > 1:
+        polylines.append(points)
+    return polylines
+
+class Painter:
+    """Measures text in CSS pixels and records draw operations, replayed at scale."""
+
+    def __init__(self, scale=3):
+        self.scale = scale
+        self.ops = []
+
+    def font(self, size, weight=400):
+        return font_cache.get_font(weight_fonts(weight), round(size * self.scale))
+
+    def line_height(self, size, weight=400):
+        """CSS line-height: normal for the face, in CSS pixels."""
+        ascent, descent = self.font(size, weight).getmetrics()
+        return (ascent + descent) / self.scale
+
+    def text_width(self, text, size, weight=400, letter_spacing=0):
+        font = self.font(size, weight)
+        if not letter_spacing:
+            return font.getlength(text) / self.scale
+        # CSS letter-spacing is added after every character, including the last
+        return sum(font.getlength(ch) for ch in text) / self.scale + letter_spacing * len(text)
+
+    def text(self, x, y, text, size, color, weight=400, letter_spacing=0):
+        """Draw text whose line box starts at y; returns its width."""
+        self.ops.append(("text", x, y, text, size, color, weight, letter_spacing))
+        return self.text_width(text, size, weight, letter_spacing)
+
+    def rect(self, x, y, width, height, color):
+        self.ops.append(("rect", x, y, width, height, color))
+
+    def circle(self, cx, cy, radius, color):
+        self.ops.append(("circle", cx, cy, radius, color))
+
+    def icon(self, x, y, shapes, color, stroke_width=1.5):
+        self.ops.append(("icon", x, y, shapes, color, stroke_width))
+
+    def render(self, width, height, background=(0, 0, 0, 0)):
+        with render_trace.span("draw", ops=len(self.ops)):
+            return self._render(width, height, background)
+
+    def _render(self, width, height, background):
+        s = self.scale
+        img = Image.new("RGBA", (round(width * s), round(height * s)), background)
+        draw = ImageDraw.Draw(img)
+        for op, *args in self.ops:
+            if op == "rect":
+                x, y, w, h, color = args
+                draw.rectangle(
+                    [round(x * s), round(y * s), round((x + w) * s) - 1, round((y + h) * s) - 1],
+                    fill=color,
+                )
+            elif op == "circle":
+                cx, cy, r, color = args
+                draw.ellipse([(cx - r) * s, (cy - r) * s, (cx + r) * s - 1, (cy + r) * s - 1], fill=color)
+            elif op == "text":
+                x, y, text, size, color, weight, letter_spacing = args
+                font = self.font(size, weight)
+                ascent, _ = font.getmetrics()
+                baseline = y * s + ascent
+                if not letter_spacing:
+                    draw.text((x * s, baseline), text, font=font, fill=color, anchor="ls")
+                    continue
+                pen = x * s
+                for ch in text:
+                    draw.text((pen, baseline), ch, font=font, fill=color, anchor="ls")
+                    pen += font.getlength(ch) + letter_spacing * s
+            elif op == "icon":
+                x, y, shapes, color, stroke_width = args
+                self._draw_icon(draw, x, y, shapes, color, stroke_width)
+        return img
+
+    def _draw_icon(self, draw, x, y, shapes, color, stroke_width):
+        s = self.scale
+        width = max(1, round(stroke_width * s))
+        for shape in shapes:
+            kind = shape[0]
+            if kind == "path":
+                for polyline in flatten_path(shape[1]):
+                    draw.line([((x + px) * s, (y + py) * s) for px, py in polyline], fill=color, width=width, joint="curve")
+            elif kind == "circle":
+                _, cx, cy, r = shape
+                draw.ellipse([(x + cx - r) * s, (y + cy - r) * s, (x + cx + r) * s, (y + cy + r) * s], outline=color, width=width)
+            elif kind == "rect":
+                _, rx, ry, rw, rh, radius = shape
+                draw.rounded_rectangle(
+                    [(x + rx) * s, (y + ry) * s, (x + rx + rw) * s, (y + ry + rh) * s],
+                    radius=radius * s, outline=color, width=width,
+                )
+
+def wrap_runs(painter, runs, size, max_width):
+    """Greedy word-wrap of (text, weight, color) runs; returns lines of positioned words."""
+    space = painter.text_width(" ", size)
+    lines = [[]]
+    line_width = 0
+    for text, weight, color in runs:
+        for word in text.split():
+            word_width = painter.text_width(word, size, weight)
+            advance = word_width if not lines[-1] else space + word_width
+            if lines[-1] and line_width + advance > max_width:
+                lines.append([])
+                line_width = 0
+                advance = word_width
+            x = line_width + (advance - word_width)
+            lines[-1].append((x, word, weight, color))
+            line_width += advance
+    return lines
+
+def render_signature(member, scale=3):
+    """Lay out one signature exactly as the .sig block in templates/signature.html."""
+    from generate_signatures import signature_text
+    p = Painter(scale)
+    width = 650
+    lh = p.line_height
+
+    # .top-stripe
+    p.rect(0, 0, width, 5, "#0a0a0a")
+    main_top = 5
+    y = main_top + 20
+    left = 25
+    right = width - 25
+
+    # .header: HOC | person on the left, company text on the right
+    hoc_h = lh(28, 200)
+    person_h = lh(14, 500) + 2 + lh(10)
+    left_h = max(hoc_h, 35, person_h)
+    brand_h = lh(10) + 3 + lh(9, 300)
+    header_h = max(left_h, brand_h)
+
+    x = left
+    x += p.text(x, y + (left_h - hoc_h) / 2, "HOC", 28, "#0a0a0a", weight=200, letter_spacing=28 * 0.06)
+    x += 15
+    p.rect(x, y + (left_h - 35) / 2, 2, 35, "#2d2d2d")
+    x += 2 + 15
+    person_y = y + (left_h - person_h) / 2
+    p.text(x, person_y, member["name"], 14, "#0a0a0a", weight=500)
+    p.text(x, person_y + lh(14, 500) + 2, member["role"], 10, "#888")
+
+    # .company is text-transform: uppercase
+    company = signature_text["company"].upper()
+    tagline = signature_text["tagline"]
+    p.text(right - p.text_width(company, 10, letter_spacing=1.2), y, company, 10, "#0a0a0a", letter_spacing=1.2)
+    p.text(right - p.text_width(tagline, 9, 300), y + lh(10) + 3, tagline, 9, "#888", weight=300)
+
+    y += header_h + 15
+    p.rect(left, y, right - left, 2, "#0a0a0a")
+    y += 2 + 15
+
+    # .body: contact rows on the left, social icons bottom-aligned on the right
+    row_h = max(14, lh(11))
+    if member["personal"]:
+        phone_items = [
+            ("Personal:", 9, "#888", 0, 3),
+            (member["personal"], 11, "#333", 0, 0),
+            ("|", 11, "#ccc", 8, 8),
+            ("Business:", 9, "#888", 0, 3),
+            (member["business"], 11, "#333", 0, 0),
+        ]
+    else:
+        phone_items = [(member["business"], 11, "#333", 0, 0)]
+    rows = [
+        (ICON_MAIL, [(f'{member["email"]}@{signature_text["domain"]}', 11, "#333", 0, 0)]),
+        (ICON_PHONE, phone_items),
+        (ICON_WEB, [(signature_text["domain"], 11, "#333", 0, 0)]),
+        (ICON_PIN, [(signature_text["address"], 11, "#333", 0, 0)]),
+    ]
+    contacts_h = len(rows) * row_h + (len(rows) - 1) * 6
+    body_h = max(contacts_h, 28)
+
+    row_y = y
+    for icon, items in rows:
+        p.icon(left, row_y + (row_h - 14) / 2, icon, "#888")
+        x = left + 14 + 10
+        for text, size, color, margin_left, margin_right in items:
+            x += margin_left
+            x += p.text(x, row_y + (row_h - lh(size)) / 2, text, size, color)
+            x += margin_right
+        row_y += row_h + 6
+
+    social_y = y + body_h - 28
+    x = right - (4 * 28 + 3 * 6)
+    for label in ["in", "f", "X", "◎"]:
+        p.circle(x + 14, social_y + 14, 14, "#0a0a0a")
+        p.text(x + 14 - p.text_width(label, 11) / 2, social_y + 14 - lh(11) / 2, label, 11, "#fff")
+        x += 28 + 6
+
+    y += body_h + 20
+    main_h = y - main_top
+
+    # .bottom-stripe and .notice
+    p.rect(0, y, width, 4, "#8a8a8a")
+    y += 4
+    notice_top = y
+    notice_lh = 9 * 1.6
+    lines = wrap_runs(p, [
+        (signature_text["notice_heading"], 700, "#666"),
+        (signature_text["notice"], 400, "#999"),
+    ], 9, width - 50)
+    notice_h = 1 + 12 + len(lines) * notice_lh + 12
+    height = notice_top + notice_h
+
+    # Backgrounds go underneath everything recorded so far
+    p.ops[:0] = [
+        ("rect", 0, 0, width, height, "#fff"),
+        ("rect", 0, main_top, width, main_h, "#f8f7f5"),
+        ("rect", 0, notice_top, width, notice_h, "#fafafa"),
+        ("rect", 0, notice_top, width, 1, "#eee"),
+    ]
+    line_y = notice_top + 1 + 12
+    for line in lines:
+        for x, word, weight, color in line:
+            p.text(left + x, line_y + (notice_lh - lh(9, weight)) / 2, word, 9, color, weight=weight)
+        line_y += notice_lh
+
+    return p.render(width, height)
+
+def render_letterhead(scale=3):
+    """Lay out the A4 letterhead exactly as the .letterhead block in generate_letterhead.py."""
+    p = Painter(scale)
+    width, height = 595, 842
+    lh = p.line_height
+    left, right = 40, width - 40
+
+    p.rect(0, 0, width, height, "#fff")
+    # .top-bar
+    p.rect(0, 0, width, 8, "#0a0a0a")
+
+    # .header-content: brand on the left, contact lines on the right
+    header_top = 8
+    y = header_top + 30
+    hoc_h = lh(42, 200)
+    text_h = lh(14) + 4 + lh(10, 300)
+    brand_h = max(hoc_h, 50, text_h)
+    contact_h = 3 * lh(10) + 2 * 4
+    content_h = max(brand_h, contact_h)
+    header_h = 30 + content_h + 20 + 3 + 25
+    p.rect(0, header_top, width, header_h, "#f8f7f5")
+
+    x = left
+    x += p.text(x, y + (brand_h - hoc_h) / 2, "HOC", 42, "#0a0a0a", weight=200, letter_spacing=42 * 0.08)
+    x += 18
+    p.rect(x, y + (brand_h - 50) / 2, 2, 50, "#2d2d2d")
+    x += 2 + 18
+    text_y = y + (brand_h - text_h) / 2
+    p.text(x, text_y, "HOUSE OF CLARENCE", 14, "#0a0a0a", letter_spacing=14 * 0.2)
+    p.text(x, text_y + lh(14) + 4, "REFINED FINISHING FOR DISCERNING SPACES", 10, "#888", weight=300, letter_spacing=10 * 0.15)
+
+    line_y = y
+    for line in ["020 3370 4057", "enquiries@houseofclarence.com", "houseofclarence.com"]:
+        p.text(right - p.text_width(line, 10), line_y, line, 10, "#555")
+        line_y += lh(10) + 4
+
+    y += content_h + 20
+    # .header-line
+    p.rect(left, y, right - left, 3, "#0a0a0a")
+
+    # .footer and .bottom-bar are pinned to the bottom; .content-area takes the rest
+    footer_h = 1 + 18 + max(lh(11), lh(10)) + 18
+    footer_top = height - 8 - footer_h
+    content_top = header_top + header_h
+    p.text(left, content_top + 40, "Content area", 11, "#ccc")
+
+    p.rect(0, footer_top, width, footer_h, "#f5f4f2")
+    p.rect(0, footer_top, width, 1, "#e8e8e8")
+    row_top = footer_top + 1 + 18
+    row_h = footer_h - 1 - 36
+    p.text(left, row_top + (row_h - lh(11)) / 2, "HOUSE OF CLARENCE", 11, "#0a0a0a", letter_spacing=11 * 0.2)
+    items = ["London", "houseofclarence.com"]
+    x = right - sum(p.text_width(item, 10) for item in items) - 30 * (len(items) - 1)
+    for item in items:
+        x += p.text(x, row_top + (row_h - lh(10)) / 2, item, 10, "#888") + 30
+
+    p.rect(0, height - 8, width, 8, "#0a0a0a")
+    return p.render(width, height)
+
+def fingerprint():
+    """Renderer version plus the bytes of every face it draws with, for build hashes."""
+    import build_manifest
+    faces = [font_cache.resolve_font_path(tuple(weight_fonts(weight))) for weight in sorted(font_paths)]
+    return [RENDERER_VERSION] + [build_manifest.file_digest(path) for path in faces]
+
+def save_signature(member, filepath, scale=3):
+    """Render one signature and write it as PNG; a picklable build job."""
+    img = render_signature(member, scale)
+    with render_trace.span("save", file=os.path.basename(filepath)):
+        img.save(filepath, "PNG")
+    return filepath
+
+def signature_png(member, scale=3):
+    """Render one signature to PNG bytes; a picklable build job for streaming exports."""
+    img = render_signature(member, scale)
+    buffer = io.BytesIO()
+    with render_trace.span("save", file=member["name"]):
+        img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+def letterhead_png(scale=3):
+    """Render the letterhead to PNG bytes."""
+    img = render_letterhead(scale)
+    buffer = io.BytesIO()
+    with render_trace.span("save", file="letterhead"):
+        img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+def save_letterhead(filepath, scale=3):
+    img = render_letterhead(scale)
+    with render_trace.span("save", file=os.path.basename(filepath)):
+        img.save(filepath, "PNG")
+    return filepath
+
+def compare_images(a, b, tolerance=48):
+    """Fraction of pixels whose largest channel difference exceeds tolerance.
+
+    Images of different sizes count as a complete mismatch.
+    """
+    if a.size != b.size:
+        return 1.0
+    diff = ImageChops.difference(a.convert("RGBA"), b.convert("RGBA"))
+    channels = diff.split()
+    peak = channels[0]
+    for channel in channels[1:]:
+        peak = ImageChops.lighter(peak, channel)
+    histogram = peak.histogram()
+    return sum(histogram[tolerance + 1:]) / (a.size[0] * a.size[1])
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare Pillow renders against Chromium captures of the signatures and letterhead."
+    )
+    parser.add_argument("chromium_dir", help="directory holding Chromium-rendered PNGs")
+    parser.add_argument("--tolerance", type=int, default=48, help="per-channel difference ignored (0-255)")
+    parser.add_argument("--max-mismatch", type=float, default=0.02, help="allowed fraction of differing pixels")
+    args = parser.parse_args()
+
+    from generate_signatures import signature_filename, team_members
+
+    cases = [(signature_filename(member), lambda m=member: render_signature(m)) for member in team_members]
+    cases.append(("HOC_Letterhead.png", render_letterhead))
+
+    compared = failures = 0
+    for filename, render in cases:
+        reference = os.path.join(args.chromium_dir, filename)
+        if not os.path.exists(reference):
+            continue
+        mismatch = compare_images(render(), Image.open(reference))
+        ok = mismatch <= args.max_mismatch
+        compared += 1
+        failures += not ok
+        print(f"{'✓' if ok else '✗'} {filename}: {mismatch:.2%} of pixels differ")
+
+    # No references means nothing was checked, which must not pass
+    if not compared:
+        print(f"✗ No Chromium references found in {args.chromium_dir}")
+    raise SystemExit(1 if failures or not compared else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Size-optimized PNG encoding for generated assets.
+Picks the smallest valid encoding per file: lossless palette when the image
+has few colours, adaptive palette quantization with alpha when it stays
+within tolerance, otherwise truecolour at maximum deflate effort.
+Metadata chunks are never written. WebP copies are optional.
+Pillow and NumPy load on first use, so importing this for its CLI options is cheap.
+"""
+
+import argparse
+import io
+import os
+import struct
+
+import asset_build
+import build_manifest
+import render_trace
+
+# Mean per-channel error allowed for a lossy palette (0-255 scale)
+PALETTE_TOLERANCE = 1.5
+
+def _png_bytes(img):
+    buffer = io.BytesIO()
+    # No pnginfo/exif/icc is passed, so only the image chunks are written
+    img.save(buffer, "PNG", optimize=True, compress_level=9)
+    return buffer.getvalue()
+
+def _palette_error(original, quantized):
+    import numpy as np
+    a = np.asarray(original.convert("RGBA"), dtype=np.int16)
+    b = np.asarray(quantized.convert("RGBA"), dtype=np.int16)
+    return float(np.abs(a - b).mean())
+
+def _exact_palette(rgba):
+    """rgba (at most 256 colours) as a P image with exactly its colours, alpha in tRNS."""
+    import numpy as np
+    from PIL import Image
+    pixels = np.ascontiguousarray(np.asarray(rgba, dtype=np.uint8))
+    colours, index = np.unique(pixels.view(np.uint32).ravel(), return_inverse=True)
+    palette = colours.view(np.uint8).reshape(-1, 4)
+    # Translucent entries first, so tRNS stops at the last of them
+    order = np.argsort(palette[:, 3], kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    palette = palette[order]
+    img = Image.frombytes("P", rgba.size, rank[index].astype(np.uint8).tobytes())
+    img.putpalette(palette[:, :3].tobytes(), "RGB")
+    translucent = int((palette[:, 3] < 255).sum())
+    if translucent:
+        img.info["transparency"] = palette[:translucent, 3].tobytes()
+    return img
+
+def encode_png(img, tolerance=PALETTE_TOLERANCE):
+    """Return the smallest PNG encoding of img that is lossless or within tolerance."""
+    from PIL import Image
+    img = img.convert("RGBA") if img.mode not in ("RGB", "RGBA", "L", "LA") else img
+    candidates = [_png_bytes(img)]
+
+    rgba = img.convert("RGBA")
+    if rgba.getcolors(256) is not None:
+        # At most 256 colours: a palette of exactly those colours is lossless
+        candidates.append(_png_bytes(_exact_palette(rgba)))
+    elif tolerance > 0:
+        for colors in (256, 128):
+            quantized = rgba.quantize(colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+            if _palette_error(rgba, quantized) > tolerance:
+                break
+            candidates.append(_png_bytes(quantized))
+
+    return min(candidates, key=len)
+
+def encode_hash(digest, optimize=True, webp=False):
+    """Fold the encoding options into an output's manifest digest, so changing them rewrites it.
+
+    PNGs are re-encoded (and WebPs written) after rendering, so the bytes on
+    disk depend on these options as well as on what was drawn. Render caches
+    are keyed without them: a cached render is the same pixels whichever way
+    it is encoded, and only the manifest has to tell the encodings apart.
+    """
+    return build_manifest.input_hash(digest, "encode", optimize, webp)
+
+def optimize_bytes(data, webp=False, tolerance=PALETTE_TOLERANCE, name=None):
+    """The smaller of a PNG's bytes and its re-encoding, plus lossless WebP bytes when asked (else None)."""
+    from PIL import Image
+    with render_trace.span("png.encode", file=name):
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+        encoded = encode_png(img, tolerance)
+    return min(data, encoded, key=len), _webp_bytes(img) if webp else None
+
+def _webp_bytes(img):
+    buffer = io.BytesIO()
+    img.save(buffer, "WEBP", lossless=True, method=6)
+    return buffer.getvalue()
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _encoded(filename, data, master_scale, densities, widths, optimize, webp, tolerance):
+    """Yield (name, size before, png, webp or None) for a master and each of its variants."""
+    import resample
+    pngs = [(filename, data)] + resample.variant_pngs(filename, data, master_scale, densities, widths)
+    for name, png in pngs:
+        before = len(png)
+        webp_data = None
+        if optimize:
+            png, webp_data = optimize_bytes(png, webp, tolerance, name)
+        elif webp:
+            from PIL import Image
+            with Image.open(io.BytesIO(png)) as img:
+                webp_data = _webp_bytes(img)
+        yield name, before, png, webp_data
+
+def encode_capture(filename, data, master_scale, densities=(), widths=(), optimize=True, webp=False,
+                   tolerance=PALETTE_TOLERANCE):
+    """Like save_capture, but return [(name, png bytes, webp bytes or None), ...] instead of writing."""
+    return [
+        (name, png, webp_data)
+        for name, _, png, webp_data in _encoded(filename, data, master_scale, densities, widths, optimize, webp, tolerance)
+    ]
+
+def save_capture(filepath, data, master_scale, densities=(), widths=(), optimize=True, webp=False,
+                 tolerance=PALETTE_TOLERANCE):
+    """Write a captured master PNG and its variants from memory; a picklable job for JobQueue.
+
+    Variants are derived and every file is optimized before it is written, so
+    each file hits the disk once. Returns (variant filenames, [(path, before, after), ...]).
+    """
+    directory = os.path.dirname(filepath)
+    variants = []
+    results = []
+    encoded = _encoded(os.path.basename(filepath), data, master_scale, densities, widths, optimize, webp, tolerance)
+    # The master comes first, then its variants
+    for index, (name, before, png, webp_data) in enumerate(encoded):
+        path = os.path.join(directory, name)
+        with render_trace.span("save", file=name):
+            _write_atomic(path, png)
+            if webp_data:
+                _write_atomic(os.path.splitext(path)[0] + ".webp", webp_data)
+        if optimize:
+            results.append((path, before, len(png)))
+        if index:
+            variants.append(name)
+    return variants, results
+
+class PngBandWriter:
+    """Write a PNG band by band, so a print-size image is never held in memory whole.
+
+    Each band (a Pillow image, full width) is Sub-filtered and deflated straight
+    into IDAT chunks; the file appears under path only once every row is written.
+    """
+
+    CHANNELS = {"RGBA": (6, 4), "RGB": (2, 3)}
+
+    def __init__(self, path, width, height, mode="RGBA", dpi=None):
+        import zlib
+        self.path = path
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.rows = 0
+        color_type, self._channels = self.CHANNELS[mode]
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._deflate = zlib.compressobj(9)
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        if dpi:
+            # pHYs is pixels per metre; lets print software size the page
+            ppm = round(dpi / 0.0254)
+            self._chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+
+    def _chunk(self, kind, data):
+        import zlib
+        self._file.write(struct.pack(">I", len(data)) + kind + data)
+        self._file.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+    def write(self, band):
+        """Append band's rows; it must be width pixels wide and in the writer's mode."""
+        import numpy as np
+        if band.size[0] != self.width or band.mode != self.mode:
+            raise ValueError(f"band is {band.mode} {band.size[0]} px wide, expected {self.mode} {self.width} px")
+        rows = np.asarray(band, dtype=np.uint8).reshape(band.height, self.width * self._channels)
+        # Sub filter: each byte minus the same channel one pixel left (wrapping), cheap in NumPy
+        filtered = rows.copy()
+        filtered[:, self._channels:] -= rows[:, :-self._channels]
+        lines = np.hstack([np.ones((band.height, 1), dtype=np.uint8), filtered])
+        data = self._deflate.compress(lines.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+        self.rows += band.height
+
+    def close(self):
+        if self.rows != self.height:
+            self.abort()
+            raise ValueError(f"wrote {self.rows} of {self.height} rows")
+        self._chunk(b"IDAT", self._deflate.flush())
+        self._chunk(b"IEND", b"")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+def optimize_file(path, webp=False, tolerance=PALETTE_TOLERANCE, optimize=True):
+    """Re-encode one PNG in place (unless optimize is False) plus an optional lossless WebP;
+    returns (path, before, after)."""
+    from PIL import Image
+    before = after = os.path.getsize(path)
+    with Image.open(path) as img:
+        img.load()
+    if optimize:
+        with render_trace.span("png.encode", file=os.path.basename(path)):
+            data = encode_png(img, tolerance)
+        if len(data) < before:
+            _write_atomic(path, data)
+        after = min(before, len(data))
+    if webp:
+        img.save(os.path.splitext(path)[0] + ".webp", "WEBP", lossless=True, method=6)
+    return path, before, after
+
+def optimize_files(paths, workers=None, webp=False, tolerance=PALETTE_TOLERANCE, optimize=True):
+    """Encode every file in parallel; results come back in the order given."""
+    jobs = [(path, webp, tolerance, optimize) for path in paths]
+    return asset_build.run_jobs(optimize_file, jobs, workers)
+
+def print_report(results):
+    """Print a before/after byte report for optimize_files results."""
+    if not results:
+        return
+    total_before = sum(before for _, before, _ in results)
+    total_after = sum(after for _, _, after in results)
+    print(f"PNG encoding: {len(results)} files")
+    for path, before, after in results:
+        print(f"  {os.path.basename(path)}: {before:,} → {after:,} bytes")
+    saved = total_before - total_after
+    percent = saved / total_before * 100 if total_before else 0
+    print(f"  Total: {total_before:,} → {total_after:,} bytes ({percent:.1f}% smaller)")
+
+def add_encode_arguments(parser):
+    """Add the shared --no-optimize/--webp options to a script's argument parser."""
+    parser.add_argument(
+        "--no-optimize", dest="optimize", action="store_false",
+        help="keep the default PNG encoding instead of picking the smallest one",
+    )
+    parser.add_argument(
+        "--webp", action="store_true",
+        help="also write a lossless WebP next to every PNG",
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode PNG files at their smallest valid size.")
+    parser.add_argument("paths", nargs="+", help="PNG files to optimize in place")
+    parser.add_argument("--webp", action="store_true", help="also write a lossless WebP next to every PNG")
+    parser.add_argument(
+        "--tolerance", type=float, default=PALETTE_TOLERANCE,
+        help="mean per-channel error allowed for a lossy palette (0 keeps encoding lossless)",
+    )
+    asset_build.add_workers_argument(parser)
+    args = parser.parse_args()
+    print_report(optimize_files(args.paths, args.workers, args.webp, args.tolerance))
+
+if __name__ == "__main__":
+    main()
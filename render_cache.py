@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Content-addressed render cache shared between checkouts, machines and CI.
+Rendered files are stored under the hash of everything they were rendered
+from, so identical work is done once wherever the cache directory is shared
+(a local path or a network mount). Writes are atomic, the store is capped by
+size with least-recently-used eviction, and every run appends hit/miss
+counts to a stats log.
+"""
+
+import argparse
+from importlib import metadata
+import json
+import os
+import platform
+import shutil
+import time
+
+import build_manifest
+
+CACHE_ENV = "HOC_RENDER_CACHE"
+DEFAULT_MAX_MB = 2048
+STATS_NAME = "stats.jsonl"
+
+def browser_fingerprint():
+    """What a Chromium render depends on besides its HTML: the OS, its installed fonts and the pinned browser build."""
+    import font_index
+    try:
+        playwright_version = metadata.version("playwright")
+    except metadata.PackageNotFoundError:
+        playwright_version = None
+    # The CSS stack ends in generic families, and missing glyphs fall back to any
+    # installed face, so every font on the machine can change the pixels
+    return [platform.system(), font_index.index_digest(), playwright_version]
+
+def pillow_fingerprint():
+    """Pillow and FreeType builds, which decide how the same font and layout rasterize."""
+    import PIL
+    from PIL import features
+    return ["pillow", PIL.__version__, features.version("freetype2")]
+
+def _copy_atomic(src, dest):
+    tmp_path = f"{dest}.{os.getpid()}.tmp"
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+class RenderCache:
+    """Blobs keyed by input hash under root/objects/<2 hex>/<hash>.
+
+    environment is whatever the renderer adds to the build digests (its
+    version, the browser build, the OS), so machines only share renders
+    they would have produced byte for byte.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_MB * 2**20, environment=()):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.environment = list(environment)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evicted = 0
+
+    def key(self, *parts):
+        return build_manifest.input_hash("render-cache", self.environment, *parts)
+
+    def _path(self, key):
+        return os.path.join(self.root, "objects", key[:2], key)
+
+    def fetch(self, key, dest):
+        """Copy the cached blob for key to dest; False (a miss) when there is none."""
+        path = self._path(key)
+        try:
+            _copy_atomic(path, dest)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        # mtime is the LRU clock; atime is often disabled on shared mounts
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return True
+
+    def read(self, key):
+        """The cached bytes for key, or None (a miss)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def write(self, key, data):
+        """Like store, for bytes held in memory."""
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.stores += 1
+
+    def store(self, key, src):
+        """Add a rendered file; concurrent writers of the same key write the same bytes."""
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _copy_atomic(src, path)
+        self.stores += 1
+
+    def entries(self):
+        """(mtime, size, path) for every blob."""
+        objects = os.path.join(self.root, "objects")
+        found = []
+        for dirpath, _, filenames in os.walk(objects):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # Evicted by another process mid-walk
+                    continue
+                found.append((stat.st_mtime, stat.st_size, path))
+        return found
+
+    def prune(self):
+        """Evict least-recently-used blobs until the store fits in max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evicted += 1
+        return total
+
+    def finish(self, label):
+        """Evict, append this run's counts to the stats log and return a one-line summary."""
+        self.prune()
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "label": label, "host": platform.node(),
+            "hits": self.hits, "misses": self.misses, "stores": self.stores, "evicted": self.evicted,
+        }
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            # One short O_APPEND write per run, so concurrent runs don't interleave lines
+            with open(os.path.join(self.root, STATS_NAME), "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
+        return f"Render cache: {self.hits} hits, {self.misses} misses, {self.stores} stored, {self.evicted} evicted"
+
+def add_cache_arguments(parser):
+    """Add the shared --cache/--cache-max-mb options to a script's argument parser."""
+    parser.add_argument(
+        "--cache", metavar="DIR", default=os.environ.get(CACHE_ENV),
+        help=f"shared render cache directory (default: ${CACHE_ENV}; unset disables the cache)",
+    )
+    parser.add_argument(
+        "--cache-max-mb", type=int, default=DEFAULT_MAX_MB,
+        help="evict least-recently-used renders beyond this size",
+    )
+
+def from_args(args, environment=()):
+    """A RenderCache for --cache, or None when caching is off."""
+    if not args.cache:
+        return None
+    return RenderCache(args.cache, args.cache_max_mb * 2**20, environment)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show statistics for, or prune, the shared render cache.")
+    add_cache_arguments(parser)
+    parser.add_argument("--prune", action="store_true", help="evict down to --cache-max-mb now")
+    args = parser.parse_args()
+    cache = from_args(args)
+    if cache is None:
+        parser.error(f"no cache directory: pass --cache or set ${CACHE_ENV}")
+
+    if args.prune:
+        cache.prune()
+        print(f"Evicted {cache.evicted} renders")
+    entries = cache.entries()
+    print(f"{len(entries)} renders, {sum(size for _, size, _ in entries) / 2**20:.1f} MB in {cache.root}")
+
+    totals = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+    try:
+        with open(os.path.join(cache.root, STATS_NAME)) as f:
+            for line in f:
+                record = json.loads(line)
+                for name in totals:
+                    totals[name] += record.get(name, 0)
+    except (OSError, ValueError):
+        pass
+    lookups = totals["hits"] + totals["misses"]
+    rate = totals["hits"] / lookups * 100 if lookups else 0
+    print(f"All runs: {totals['hits']} hits, {totals['misses']} misses ({rate:.1f}% hit rate), "
+          f"{totals['stores']} stored, {totals['evicted']} evicted")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Render-ready barrier for Playwright captures.
+Waits for web fonts to finish loading and for a frame to be painted,
+instead of sleeping for a fixed time before each screenshot.
+"""
+
+import time
+
+# Resolves true once fonts are ready and two animation frames have run
+# (the second frame guarantees the first one was painted), or false on timeout
+READY_SCRIPT = """(timeout) => new Promise(resolve => {
+  const timer = setTimeout(() => resolve(false), timeout);
+  document.fonts.ready.then(() => {
+    requestAnimationFrame(() => requestAnimationFrame(() => {
+      clearTimeout(timer);
+      resolve(true);
+    }));
+  });
+})"""
+
+# Default upper bound on a single wait, in milliseconds
+READY_TIMEOUT = 5000
+
+class ReadyTimings:
+    """Records how long each render-ready wait took."""
+
+    def __init__(self):
+        self.waits = []
+        self.timeouts = 0
+
+    def record(self, elapsed_ms, ready):
+        self.waits.append(elapsed_ms)
+        if not ready:
+            self.timeouts += 1
+
+    def summary(self):
+        if not self.waits:
+            return "Render-ready wait: no pages"
+        mean = sum(self.waits) / len(self.waits)
+        line = (
+            f"Render-ready wait: {mean:.1f} ms mean, {max(self.waits):.1f} ms max "
+            f"over {len(self.waits)} pages"
+        )
+        if self.timeouts:
+            line += f" ({self.timeouts} timed out)"
+        return line
+
+def wait_until_ready(page, timeout=READY_TIMEOUT, timings=None):
+    """Block until the page is painted with its final fonts; returns the wait in ms."""
+    start = time.perf_counter()
+    ready = page.evaluate(READY_SCRIPT, timeout)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if timings is not None:
+        timings.record(elapsed_ms, ready)
+    return elapsed_ms
+
+async def wait_until_ready_async(page, timeout=READY_TIMEOUT, timings=None):
+    """Async version of wait_until_ready for playwright.async_api pages."""
+    start = time.perf_counter()
+    ready = await page.evaluate(READY_SCRIPT, timeout)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if timings is not None:
+        timings.record(elapsed_ms, ready)
+    return elapsed_ms
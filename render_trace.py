@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-stage timing for the render pipeline.
+Spans are recorded only after enable(); when disabled, span() hands back a
+shared no-op context so instrumented code pays a single global lookup.
+Traces export as Chrome-trace/Perfetto JSON plus a per-stage summary table.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+
+_NULL_SPAN = contextlib.nullcontext()
+
+# Recorded events while tracing is on, None while it is off
+_events = None
+_lanes = {}
+
+def enable():
+    """Start recording spans (clears anything recorded before)."""
+    global _events
+    _events = []
+    _lanes.clear()
+
+def disable():
+    global _events
+    _events = None
+
+def enabled():
+    return _events is not None
+
+def _lane():
+    """A stable integer track per thread or asyncio task, so concurrent work gets its own row."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    key = (threading.get_ident(), id(task) if task else None)
+    if key not in _lanes:
+        _lanes[key] = len(_lanes) + 1
+    return _lanes[key]
+
+@contextlib.contextmanager
+def _record(name, args):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _events.append({
+            "name": name,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": _lane(),
+            "args": args,
+        })
+
+def span(name, **args):
+    """Context manager timing one stage of one asset; a no-op unless tracing is enabled."""
+    if _events is None:
+        return _NULL_SPAN
+    return _record(name, args)
+
+def events():
+    return list(_events or [])
+
+def merge(other_events):
+    """Add spans recorded in another process (e.g. a pool worker)."""
+    if _events is not None:
+        _events.extend(other_events)
+
+def call_traced(func, *args):
+    """Run func(*args) with tracing on and return (result, events); used inside pool workers."""
+    enable()
+    try:
+        return func(*args), events()
+    finally:
+        disable()
+
+def write_chrome_trace(path):
+    """Export recorded spans in Chrome trace event format (opens in Perfetto or chrome://tracing)."""
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events(), "displayTimeUnit": "ms"}, f)
+
+def summary_table():
+    """Per-stage count, total, mean and max duration, slowest total first."""
+    stages = {}
+    for event in events():
+        stats = stages.setdefault(event["name"], [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += event["dur"]
+        stats[2] = max(stats[2], event["dur"])
+    lines = [f"{'stage':<28} {'count':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}", "-" * 66]
+    for name, (count, total, peak) in sorted(stages.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<28} {count:>6} {total / 1000:>10.2f} {total / count / 1000:>9.2f} {peak / 1000:>9.2f}")
+    return "\n".join(lines)
+
+def add_trace_argument(parser):
+    """Add the shared --trace option to a script's argument parser."""
+    parser.add_argument(
+        "--trace", metavar="PATH",
+        help="record per-stage timings and write a Chrome/Perfetto trace JSON to PATH",
+    )
+
+def start_from_args(args):
+    if args.trace:
+        enable()
+
+def finish_from_args(args):
+    """Write the trace and print the stage summary if --trace was given."""
+    if not args.trace:
+        return
+    write_chrome_trace(args.trace)
+    print()
+    print(summary_table())
+    print(f"Trace written to: {args.trace}")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution output stage.
+Every lower density or size is derived in memory from one high-resolution
+master, by successive halving followed by a final Lanczos resample.
+"""
+
+import io
+import os
+
+import build_manifest
+import render_trace
+
+def downsample(img, size):
+    """Resize img to size (width, height) with a halving chain plus a final Lanczos."""
+    from PIL import Image
+    width, height = size
+    # Box-halve while we're still at least twice the target; cheap and alias-free
+    while img.width >= width * 2 and img.height >= height * 2:
+        img = img.reduce(2)
+    if img.size != (width, height):
+        img = img.resize((width, height), Image.Resampling.LANCZOS)
+    return img
+
+def derive_sizes(master, sizes):
+    """Derive several sizes from one master, largest first so each halving chain is reused."""
+    derived = {}
+    current = master
+    for size in sorted(set(sizes), key=lambda s: s[0] * s[1], reverse=True):
+        # Continue from the smallest intermediate that is still large enough
+        while current.width >= size[0] * 2 and current.height >= size[1] * 2:
+            current = current.reduce(2)
+        derived[size] = downsample(current, size)
+    return {size: derived[size] for size in sizes}
+
+def parse_list(value, cast=int):
+    """Parse a comma-separated option value such as "1,2"."""
+    if not value:
+        return []
+    return [cast(part) for part in value.split(",") if part.strip()]
+
+def variant_sizes(master_size, master_scale, densities=(), widths=()):
+    """Map variant suffixes to pixel sizes: "@1x"/"@2x" densities and "-600w" widths."""
+    width, height = master_size
+    variants = {}
+    for density in densities:
+        if density == master_scale:
+            continue
+        ratio = density / master_scale
+        variants[f"@{density:g}x"] = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    for target_width in widths:
+        ratio = target_width / width
+        variants[f"-{target_width}w"] = (target_width, max(1, round(height * ratio)))
+    return variants
+
+def variant_hash(digest, densities=(), widths=()):
+    """Fold the requested variants into an output's manifest digest."""
+    if not densities and not widths:
+        return digest
+    return build_manifest.input_hash(digest, densities, widths)
+
+def render_variants(source, master_scale, densities=(), widths=()):
+    """Derive every requested density/width variant of a master PNG (a path or file object).
+
+    Returns {suffix: image}.
+    """
+    from PIL import Image
+    with Image.open(source) as master:
+        master.load()
+    variants = variant_sizes(master.size, master_scale, densities, widths)
+    images = derive_sizes(master, list(variants.values()))
+    return {suffix: images[size] for suffix, size in variants.items()}
+
+def write_variants(filepath, master_scale, densities=(), widths=()):
+    """Write every requested density/width variant next to a master PNG.
+
+    Returns the filenames written.
+    """
+    if not densities and not widths:
+        return []
+    with render_trace.span("variants", file=os.path.basename(filepath)):
+        images = render_variants(filepath, master_scale, densities, widths)
+    stem, ext = os.path.splitext(filepath)
+    written = []
+    for suffix, img in images.items():
+        path = f"{stem}{suffix}{ext}"
+        img.save(path, "PNG")
+        written.append(os.path.basename(path))
+    return written
+
+def variant_pngs(filename, data, master_scale, densities=(), widths=()):
+    """Like write_variants, for a master held in memory; returns [(filename, png bytes), ...]."""
+    if not densities and not widths:
+        return []
+    with render_trace.span("variants", file=filename):
+        images = render_variants(io.BytesIO(data), master_scale, densities, widths)
+    stem, ext = os.path.splitext(filename)
+    pngs = []
+    for suffix, img in images.items():
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        pngs.append((f"{stem}{suffix}{ext}", buffer.getvalue()))
+    return pngs
+
+def add_variant_arguments(parser):
+    """Add the shared --densities/--widths options to a script's argument parser."""
+    parser.add_argument(
+        "--densities", type=parse_list, default=[],
+        help="extra pixel densities to derive from the 3x capture, e.g. 1,2",
+    )
+    parser.add_argument(
+        "--widths", type=parse_list, default=[],
+        help="extra pixel widths to derive from the 3x capture, e.g. 600,320",
+    )
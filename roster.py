@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Streaming roster input for the signature generator.
+Members are read lazily from CSV or JSONL (a file or stdin) and validated
+row by row, so a roster of any size is never held in memory at once.
+"""
+
+import csv
+import json
+import sys
+
+REQUIRED_FIELDS = ("name", "role", "business", "email")
+OPTIONAL_FIELDS = ("personal",)
+
+class RosterError(ValueError):
+    """A roster row that cannot be turned into a member record."""
+
+def validate_member(row):
+    """Normalise one raw row into a member dict, or raise RosterError."""
+    if not isinstance(row, dict):
+        raise RosterError("row is not an object")
+    member = {}
+    for field in REQUIRED_FIELDS:
+        value = row.get(field)
+        value = str(value).strip() if value is not None else ""
+        if not value:
+            raise RosterError(f"missing {field}")
+        member[field] = value
+    for field in OPTIONAL_FIELDS:
+        value = row.get(field)
+        value = str(value).strip() if value is not None else ""
+        member[field] = value or None
+
+    # The email field is the local part only, e.g. "aaron" for aaron@houseofclarence.uk
+    email = member["email"]
+    if "@" in email:
+        email = email.split("@", 1)[0]
+    if not email or any(ch.isspace() for ch in email):
+        raise RosterError(f"invalid email {member['email']!r}")
+    member["email"] = email
+
+    # The name becomes a file and archive entry name
+    name = member["name"]
+    if any(ch in "/\\" or not ch.isprintable() for ch in name) or ".." in name:
+        raise RosterError(f"invalid name {name!r}")
+    return member
+
+def _csv_rows(stream):
+    reader = csv.DictReader(stream)
+    # Line 1 is the header
+    for line_no, row in enumerate(reader, start=2):
+        yield line_no, row
+
+def _jsonl_rows(stream):
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as exc:
+            yield line_no, RosterError(f"invalid JSON: {exc}")
+
+def detect_format(path):
+    """Roster format from the file extension; stdin defaults to JSONL."""
+    if path.endswith(".csv"):
+        return "csv"
+    return "jsonl"
+
+def iter_members(path, fmt=None, on_error=None, key=None):
+    """Yield validated members from a CSV/JSONL file, or stdin when path is "-".
+
+    Malformed rows are passed to on_error(line_no, message) and skipped. With
+    key (e.g. the output filename), a member whose key an earlier row already
+    had is reported and skipped the same way.
+    """
+    fmt = fmt or detect_format(path)
+    # key -> line it was first seen on
+    seen = {}
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        rows = _csv_rows(stream) if fmt == "csv" else _jsonl_rows(stream)
+        for line_no, row in rows:
+            try:
+                if isinstance(row, RosterError):
+                    raise row
+                member = validate_member(row)
+                if key is not None:
+                    k = key(member)
+                    if k in seen:
+                        raise RosterError(f"duplicate of line {seen[k]} ({k})")
+                    seen[k] = line_no
+                yield member
+            except RosterError as exc:
+                if on_error:
+                    on_error(line_no, str(exc))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def add_roster_arguments(parser):
+    """Add the shared --roster/--roster-format options to an argument parser."""
+    parser.add_argument(
+        "--roster", metavar="PATH",
+        help="read members from a CSV or JSONL file, or '-' for stdin (default: built-in team list)",
+    )
+    parser.add_argument(
+        "--roster-format", choices=["csv", "jsonl"], default=None,
+        help="roster format (default: from the file extension, JSONL for stdin)",
+    )
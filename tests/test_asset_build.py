@@ -0,0 +1,14 @@
+import pytest
+
+import asset_build
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_job_queue_returns_failures_in_order(workers):
+    with asset_build.JobQueue(workers) as queue:
+        for text in ["1", "x", "3"]:
+            queue.submit(text, int, text)
+        outcomes = list(queue.ready()) + list(queue.drain())
+    assert [tag for tag, _, _ in outcomes] == ["1", "x", "3"]
+    assert [result for _, result, _ in outcomes] == [1, None, 3]
+    assert outcomes[0][2] is None and outcomes[2][2] is None
+    assert isinstance(outcomes[1][2], ValueError)
@@ -0,0 +1,31 @@
+import pytest
+
+import generate_signatures
+import html_template
+
+@pytest.mark.parametrize("value, escaped", [
+    ("Smith & Sons", "Smith &amp; Sons"),
+    ("<script>alert(1)</script>", "&lt;script&gt;alert(1)&lt;/script&gt;"),
+    ("\"quoted\" and 'single'", "&quot;quoted&quot; and &#x27;single&#x27;"),
+])
+def test_fields_are_escaped(value, escaped):
+    template = html_template.Template('<a title="{{name}}">{{name}}</a>')
+    assert template.render({"name": value}) == f'<a title="{escaped}">{escaped}</a>'
+
+def test_triple_braces_insert_as_is():
+    css = "    .sig > p { content: \"&\"; }\n"
+    assert html_template.Template("<style>{{{extra_css}}}</style>").render({"extra_css": css}) == f"<style>{css}</style>"
+
+@pytest.mark.parametrize("personal", ["", None])
+def test_empty_personal_number_drops_its_section(personal):
+    member = {"name": "Aaron Money", "role": "Managing Director", "personal": personal,
+              "business": "0203 715 5892", "email": "aaron"}
+    html = generate_signatures.generate_signature_html(member)
+    assert "Personal:" not in html
+    assert "0203 715 5892" in html
+
+def test_personal_number_keeps_its_section():
+    member = {"name": "Aaron Money", "role": "Managing Director", "personal": "07939 983 477",
+              "business": "0203 715 5892", "email": "aaron"}
+    html = generate_signatures.generate_signature_html(member)
+    assert "Personal:</span> 07939 983 477" in html
@@ -0,0 +1,51 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import png_encode
+
+def decode(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGBA"))
+
+def few_colour_image(colours, size=(64, 48), seed=0):
+    rng = np.random.default_rng(seed)
+    palette = rng.integers(0, 256, size=(colours, 4), dtype=np.uint8)
+    pixels = palette[rng.integers(0, colours, size=(size[1], size[0]))]
+    return Image.fromarray(pixels, "RGBA")
+
+@pytest.mark.parametrize("colours", [1, 2, 17, 200, 256])
+def test_palette_encoding_round_trips_exactly(colours):
+    img = few_colour_image(colours)
+    data = png_encode.encode_png(img, tolerance=0)
+    assert np.array_equal(decode(data), np.asarray(img))
+
+def test_antialiased_alpha_edges_round_trip_exactly():
+    # One colour at every coverage level, like a rendered glyph edge
+    alpha = np.tile(np.arange(256, dtype=np.uint8), (8, 1))
+    pixels = np.zeros((8, 256, 4), dtype=np.uint8)
+    pixels[..., :3] = (10, 10, 10)
+    pixels[..., 3] = alpha
+    img = Image.fromarray(pixels, "RGBA")
+    data = png_encode.encode_png(img)
+    assert np.array_equal(decode(data), pixels)
+
+def test_optimize_bytes_never_changes_pixels():
+    img = few_colour_image(100, seed=1)
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    optimized, webp = png_encode.optimize_bytes(buffer.getvalue())
+    assert webp is None
+    assert np.array_equal(decode(optimized), np.asarray(img))
+
+def test_webp_is_written_without_optimizing(tmp_path):
+    img = few_colour_image(100, seed=2)
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    path = tmp_path / "logo.png"
+    path.write_bytes(buffer.getvalue())
+    png_encode.optimize_file(str(path), webp=True, optimize=False)
+    assert path.read_bytes() == buffer.getvalue()
+    assert np.array_equal(decode((tmp_path / "logo.webp").read_bytes()), np.asarray(img))
@@ -0,0 +1,66 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+import bundle
+import generate_signatures
+import roster
+
+def member(**fields):
+    row = {"name": "Aaron Money", "role": "Managing Director", "business": "0203 715 5892", "email": "aaron"}
+    row.update(fields)
+    return row
+
+@pytest.mark.parametrize("name", ["../../etc/passwd", "a/b", "a\\b", "..", "x\ny", "tab\there", "nul\x00"])
+def test_unsafe_names_are_rejected(name):
+    with pytest.raises(roster.RosterError):
+        roster.validate_member(member(name=name))
+
+@pytest.mark.parametrize("name", ["Aaron Money", "Dr. Jane O'Neil", "Zoë Ångström-Smith"])
+def test_ordinary_names_are_accepted(name):
+    assert roster.validate_member(member(name=name))["name"] == name
+
+@pytest.mark.parametrize("name", ["../../etc/passwd", "a/b", "..", ".hidden", "a:b*c?"])
+def test_signature_filename_stays_in_the_output_dir(name):
+    filename = generate_signatures.signature_filename({"name": name})
+    assert "/" not in filename and "\\" not in filename
+    assert not filename.startswith(".")
+    assert filename.endswith(".png")
+
+def test_signature_filename_is_unchanged_for_ordinary_names():
+    assert generate_signatures.signature_filename({"name": "Thomas George Palatty"}) == "Thomas_George_Palatty.png"
+
+def test_bad_and_duplicate_rows_are_reported_and_skipped(tmp_path):
+    rows = [
+        member(),
+        member(name="../../etc/passwd"),
+        member(name="Aaron_Money", email="other"),
+        member(name="Akila Ramachandran", email="akila"),
+    ]
+    path = tmp_path / "roster.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    errors = []
+    members = list(roster.iter_members(
+        str(path), on_error=lambda line, message: errors.append((line, message)),
+        key=generate_signatures.signature_filename,
+    ))
+    assert [m["name"] for m in members] == ["Aaron Money", "Akila Ramachandran"]
+    assert [line for line, _ in errors] == [2, 3]
+    assert "duplicate of line 1" in errors[1][1]
+
+@pytest.mark.parametrize("name", ["../evil.png", "/abs.png", "a/../../b.png", "a\\..\\b.png", "a//b.png"])
+def test_bundle_refuses_entries_outside_the_archive(tmp_path, name):
+    archive = bundle.Bundle(str(tmp_path / "out.zip"))
+    with pytest.raises(ValueError):
+        archive.add(name, b"data")
+    archive.abort()
+
+def test_bundle_entry_names(tmp_path):
+    target = tmp_path / "out.zip"
+    archive = bundle.Bundle(str(target))
+    archive.add(generate_signatures.signature_filename({"name": "Aaron Money"}), b"png")
+    archive.close()
+    with zipfile.ZipFile(io.BytesIO(target.read_bytes())) as zf:
+        assert zf.namelist() == ["Aaron_Money.png", "index.json", "index.html"]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Visual-regression check for generated assets.
+Every PNG in a golden directory is compared with the file at the same
+relative path in a freshly rendered directory: per-pixel differences beyond
+a tolerance, plus a windowed SSIM score, computed with NumPy on a process
+pool. Byte-identical files are passed without decoding, so the check is
+cheap enough for every build. Failures can get a diff heat-map, and the
+results are written as a JSON report.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import asset_build
+import build_manifest
+
+# SSIM window edge in pixels and the usual stabilizing constants for 8-bit data
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+def find_pngs(root):
+    """Relative paths of every PNG under root, sorted."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".png"):
+                found.append(os.path.relpath(os.path.join(dirpath, filename), root))
+    return found
+
+def load_premultiplied(path):
+    """An HxWx4 float32 array with colour premultiplied by alpha, so invisible pixels compare equal."""
+    import numpy as np
+    from PIL import Image
+    with Image.open(path) as img:
+        rgba = np.asarray(img.convert("RGBA"), dtype=np.float32)
+    rgba[..., :3] *= rgba[..., 3:] / 255
+    return rgba
+
+def _box_mean(x, k):
+    """Mean over every k x k window (valid positions only), from an integral image."""
+    import numpy as np
+    c = np.zeros((x.shape[0] + 1, x.shape[1] + 1), dtype=np.float64)
+    c[1:, 1:] = x.cumsum(0).cumsum(1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+def ssim(a, b):
+    """Mean windowed SSIM of two 2-D arrays (1.0 is identical)."""
+    k = min(SSIM_WINDOW, a.shape[0], a.shape[1])
+    mu_a, mu_b = _box_mean(a, k), _box_mean(b, k)
+    var_a = _box_mean(a * a, k) - mu_a * mu_a
+    var_b = _box_mean(b * b, k) - mu_b * mu_b
+    cov = _box_mean(a * b, k) - mu_a * mu_b
+    score = ((2 * mu_a * mu_b + SSIM_C1) * (2 * cov + SSIM_C2)) / (
+        (mu_a * mu_a + mu_b * mu_b + SSIM_C1) * (var_a + var_b + SSIM_C2)
+    )
+    return float(score.mean())
+
+def heatmap(golden, peak, path):
+    """Write the golden image greyed out with differing pixels in red, brighter for larger differences."""
+    import numpy as np
+    from PIL import Image
+    luma = golden[..., :3].mean(axis=2) + (255 - golden[..., 3])
+    base = 128 + luma.clip(0, 255) * 0.25
+    strength = np.clip(peak * 4, 0, 255) / 255
+    out = np.empty(golden.shape[:2] + (3,), dtype=np.float32)
+    out[..., 0] = base * (1 - strength) + 255 * strength
+    out[..., 1] = base * (1 - strength)
+    out[..., 2] = base * (1 - strength)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(out.astype(np.uint8), "RGB").save(path)
+
+def compare_file(name, golden_path, current_path, tolerance=8, max_mismatch=0.001, min_ssim=0.99, heatmap_path=None):
+    """Compare one golden/current pair; a picklable job returning a report entry."""
+    import numpy as np
+    entry = {"file": name}
+    if not os.path.exists(current_path):
+        return {**entry, "status": "missing"}
+    if build_manifest.file_digest(golden_path) == build_manifest.file_digest(current_path):
+        return {**entry, "status": "pass", "identical": True, "mismatch": 0.0, "max_diff": 0, "ssim": 1.0}
+
+    golden = load_premultiplied(golden_path)
+    current = load_premultiplied(current_path)
+    entry["size"] = [golden.shape[1], golden.shape[0]]
+    if golden.shape != current.shape:
+        return {**entry, "status": "fail", "reason": "size", "current_size": [current.shape[1], current.shape[0]]}
+
+    # Largest channel difference per pixel
+    peak = np.abs(golden - current).max(axis=2)
+    mismatch = float((peak > tolerance).mean())
+    if peak.any():
+        # Structure in luminance and in coverage; the worse of the two counts
+        weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        score = min(ssim(golden[..., :3] @ weights, current[..., :3] @ weights), ssim(golden[..., 3], current[..., 3]))
+    else:
+        score = 1.0
+    ok = mismatch <= max_mismatch and score >= min_ssim
+    entry.update(
+        status="pass" if ok else "fail", identical=False, mismatch=mismatch,
+        max_diff=int(peak.max()), mean_diff=float(peak.mean()), ssim=score,
+    )
+    if not ok and heatmap_path:
+        heatmap(golden, peak, heatmap_path)
+        entry["heatmap"] = heatmap_path
+    return entry
+
+def check(golden_dir, current_dir, tolerance=8, max_mismatch=0.001, min_ssim=0.99, heatmap_dir=None, workers=None):
+    """Compare every golden PNG in parallel; returns the report dict."""
+    names = find_pngs(golden_dir)
+    jobs = [
+        (
+            name, os.path.join(golden_dir, name), os.path.join(current_dir, name),
+            tolerance, max_mismatch, min_ssim,
+            os.path.join(heatmap_dir, name) if heatmap_dir else None,
+        )
+        for name in names
+    ]
+    files = asset_build.run_jobs(compare_file, jobs, workers)
+    new = sorted(set(find_pngs(current_dir)) - set(names)) if os.path.isdir(current_dir) else []
+    summary = {status: sum(entry["status"] == status for entry in files) for status in ("pass", "fail", "missing")}
+    summary["new"] = len(new)
+    return {
+        "golden": golden_dir, "current": current_dir,
+        "tolerance": tolerance, "max_mismatch": max_mismatch, "min_ssim": min_ssim,
+        "summary": summary, "files": files, "new": new,
+    }
+
+def update_golden(golden_dir, current_dir):
+    """Bless the current renders: copy every current PNG into the golden set."""
+    names = find_pngs(current_dir)
+    for name in names:
+        target = os.path.join(golden_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(current_dir, name), target)
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare freshly rendered PNGs against a golden set.")
+    parser.add_argument("golden_dir", help="directory of approved PNGs")
+    parser.add_argument("current_dir", help="directory of fresh renders, laid out like golden_dir")
+    parser.add_argument("--tolerance", type=int, default=8, help="per-channel difference ignored (0-255)")
+    parser.add_argument("--max-mismatch", type=float, default=0.001, help="allowed fraction of differing pixels")
+    parser.add_argument("--min-ssim", type=float, default=0.99, help="lowest acceptable SSIM score")
+    parser.add_argument("--heatmaps", metavar="DIR", help="write a diff heat-map for every failing file here")
+    parser.add_argument("--report", metavar="PATH", help="write the JSON report here ('-' for stdout)")
+    parser.add_argument("--update", action="store_true", help="copy the current renders over the golden set and exit")
+    asset_build.add_workers_argument(parser)
+    args = parser.parse_args()
+
+    if args.update:
+        names = update_golden(args.golden_dir, args.current_dir)
+        if not names:
+            parser.error(f"no PNGs in {args.current_dir} to bless")
+        print(f"Golden set updated: {len(names)} PNGs copied to {args.golden_dir}")
+        return
+    # An empty golden set would compare nothing and pass
+    if not os.path.isdir(args.golden_dir):
+        parser.error(f"golden directory {args.golden_dir} does not exist (bless one with --update)")
+
+    report = check(
+        args.golden_dir, args.current_dir, args.tolerance, args.max_mismatch, args.min_ssim,
+        args.heatmaps, args.workers,
+    )
+    # With the report on stdout, the human-readable lines go to stderr
+    log = sys.stderr if args.report == "-" else sys.stdout
+    for entry in report["files"]:
+        if entry["status"] == "missing":
+            print(f"✗ {entry['file']}: missing from {args.current_dir}", file=log)
+        elif entry.get("reason") == "size":
+            print(f"✗ {entry['file']}: size {entry['current_size']} != {entry['size']}", file=log)
+        elif not entry["identical"]:
+            mark = "✓" if entry["status"] == "pass" else "✗"
+            print(f"{mark} {entry['file']}: {entry['mismatch']:.3%} of pixels differ, SSIM {entry['ssim']:.4f}", file=log)
+    for name in report["new"]:
+        print(f"? {name}: not in the golden set", file=log)
+    if not report["files"]:
+        print(f"✗ No PNGs in {args.golden_dir}: nothing was checked", file=log)
+    summary = report["summary"]
+    print(
+        f"{summary['pass']} passed, {summary['fail']} failed, {summary['missing']} missing, {summary['new']} new",
+        file=log,
+    )
+
+    if args.report == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    raise SystemExit(1 if summary["fail"] or summary["missing"] or not report["files"] else 0)
+
+if __name__ == "__main__":
+    main()